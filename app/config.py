@@ -8,6 +8,19 @@ PAGE_CONFIG = {
     "initial_sidebar_state": "expanded"
 }
 
+# Plant Dataset Settings
+PLANT_DATA_SETTINGS = {
+    "path": "data/data2.csv",  # relative to the project root
+    "reload_check_interval": 2.0  # seconds between source file change checks
+}
+
+# Processed Plant Table Cache (columnar .npy files keyed by source hash)
+TABLE_CACHE_SETTINGS = {
+    "enabled": True,
+    "directory": "data/.cache",  # relative to the project root
+    "max_entries": 4
+}
+
 # Safety Classification Thresholds
 SAFETY_THRESHOLDS = {
     "safe_age": 15,
@@ -22,6 +35,58 @@ DISTANCE_THRESHOLDS = {
     "dangerous_zone": 50
 }
 
+# Distance (in kilometers) within which the user counts as on-site at a plant
+ON_SITE_DISTANCE_KM = 1
+
+# Spatial Index Settings
+SPATIAL_INDEX_SETTINGS = {
+    "cell_size_deg": 1.0  # grid cell edge; ~111km of latitude
+}
+
+# Per-location Result Cache Settings
+RESULT_CACHE_SETTINGS = {
+    "max_entries": 512,
+    "max_bytes": 64 * 1024 * 1024,  # estimated in-memory size of cached results
+    "location_cell_deg": 0.0001  # users within the same ~11m cell share a result (at most ~8m off)
+}
+
+# Plant Table Query Settings (/get_data pagination, sorting and filters)
+PLANT_QUERY_SETTINGS = {
+    "default_limit": 50,  # rows per page when a query omits 'limit'
+    "max_limit": 1000,
+    "max_nearest": 50
+}
+
+# Plant Update API Settings
+PLANT_UPDATE_SETTINGS = {
+    "max_changes": 1000,  # upserts plus deletes per request
+    "max_age": 200,  # oldest plausible plant age in years
+    "token_env": "PLANT_ADMIN_TOKEN"  # updates are disabled unless this env var is set
+}
+
+# Serialized Response Cache Settings
+RESPONSE_CACHE_SETTINGS = {
+    "max_entries": 256,
+    "max_bytes": 64 * 1024 * 1024,  # serialized JSON plus compressed variants
+    "compress_min_bytes": 1024,  # smaller bodies are sent uncompressed
+    "gzip_level": 6,
+    "brotli_quality": 5  # used only when the optional brotli package is installed
+}
+
+# Batch Proximity API Settings
+BATCH_SETTINGS = {
+    "max_points": 10000,  # per request
+    "max_nearest": 20,
+    "default_nearest": 3,
+    "chunk_bytes": 32 * 1024 * 1024  # distance matrix memory per chunk
+}
+
+# Precomputed Risk Raster Settings
+RISK_RASTER_SETTINGS = {
+    "resolution_deg": 0.1,  # grid cell size; ~11km of latitude
+    "app_resolution_deg": 0.5  # global raster the web app builds on first use and updates on edits
+}
+
 # Default Location (Prayagraj / Allahabad, India)
 DEFAULT_LOCATION = {
     "latitude": 25.4358,
@@ -32,13 +97,36 @@ DEFAULT_LOCATION = {
 LOCATION_RETRY_ATTEMPTS = 3
 LOCATION_RETRY_DELAY = 1  # seconds
 
+# Per-client IP Geolocation Settings
+GEOLOCATION_SETTINGS = {
+    "deadline_seconds": 1.0,  # fall back to DEFAULT_LOCATION after this
+    "cache_ttl_seconds": 3600,
+    "negative_ttl_seconds": 60,  # failed lookups are retried after this
+    "cache_max_entries": 10000,
+    "max_workers": 4,
+    "max_pending": 100,  # lookups in flight or queued; beyond this clients get the default
+    "lookup_timeout_seconds": 5.0,  # per web service request
+    "ip_database": None,  # optional start_ip,end_ip,latitude,longitude CSV
+    "trust_forwarded_for": False  # only enable behind a trusted reverse proxy
+}
+
 # Map Settings
 MAP_SETTINGS = {
     "default_zoom": 6,
     "default_tile": "CartoDB dark_matter",
     "circle_radius": 30000,  # meters
     "user_radius": 50000,  # meters for user location circle
-    "user_icon_size": (30, 30)
+    "user_icon_size": (30, 30),
+    "plant_layer": "viewport",  # 'markers', 'cluster' or 'viewport'
+    "viewport_max_plants": 5000  # cap per bounding-box response
+}
+
+# Rendered Map File Cache (content-addressed files under static/maps)
+MAP_CACHE_SETTINGS = {
+    "directory": "static/maps",  # relative to the project root
+    "max_bytes": 256 * 1024 * 1024,
+    "max_age_seconds": 7 * 24 * 3600,  # since last use
+    "http_max_age": 365 * 24 * 3600  # files never change once written
 }
 
 # Notification Settings
@@ -48,6 +136,11 @@ NOTIFICATION_TIMEOUTS = {
     "safe": 5
 }
 
+# Background Notification Delivery
+NOTIFICATION_QUEUE_SETTINGS = {
+    "max_pending": 64  # oldest pending notification is dropped beyond this
+}
+
 # Safety Colors and Icons
 SAFETY_COLORS = {
     'Safe': {'color': '#28a745', 'icon': 'check-circle'},
@@ -55,3 +148,54 @@ SAFETY_COLORS = {
     'Moderate': {'color': '#ffc107', 'icon': 'exclamation-circle'}
 }
 
+
+# Production Server Settings (serve.py; env vars override, CLI flags override both)
+SERVER_SETTINGS = {
+    "bind": "0.0.0.0:8000",  # SERVER_BIND
+    "workers": None,  # WEB_CONCURRENCY; None means 2 x CPUs + 1
+    "threads": 4,  # SERVER_THREADS; per worker
+    "timeout": 30,  # seconds before a silent worker is restarted
+    "graceful_timeout": 30,  # seconds workers get to finish requests on shutdown
+    "keepalive": 5,
+    "max_requests": 0  # restart workers after this many requests (0 = never)
+}
+
+# Metrics and Timing Settings
+METRICS_SETTINGS = {
+    "enabled": True,  # metrics endpoint and Server-Timing headers
+    "path": "/metrics",
+    "buckets": (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # seconds
+}
+
+# Request Profiling Settings
+PROFILING_SETTINGS = {
+    "token_env": "PROFILE_TOKEN",  # profiling is off unless this variable is set
+    "header": "X-Profile",  # send the token here...
+    "query_param": "profile",  # ...or as ?profile=<token>
+    "directory": "profiles",  # relative to the project root
+    "max_profiles": 20,  # per worker process; restart to profile again
+    "min_interval": 10  # seconds between profiled requests
+}
+
+# Live Location Tracking Settings
+TRACKING_SETTINGS = {
+    "min_move_km": 0.5,  # smaller moves are ignored
+    "rebase_km": 25,  # beyond this from the last full computation, start a new one
+    "slack_km": 0.05,  # allowance for distance formula error at zone boundaries
+    "max_subjects": 10000,  # tracked sessions kept per process (least recent dropped)
+    "queue_size": 16,  # pending events per stream
+    "heartbeat_seconds": 15,  # keepalive comment interval on idle streams
+    "stream_seconds": 300,  # streams end after this; browsers reconnect automatically
+    "stream_enabled": False  # each open stream holds a server thread; see README before enabling
+}
+
+# Geofence Settings
+GEOFENCE_SETTINGS = {
+    "hysteresis_km": {  # a fence is left only this far beyond its radius
+        "zone": 2.0,
+        "on_site": 0.25
+    },
+    "rebase_km": 25,  # beyond this from the last full measurement, start a new one
+    "slack_km": 0.05,  # allowance for distance formula error at fence boundaries
+    "max_subjects": 10000  # subjects kept per process (least recent dropped)
+}
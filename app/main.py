@@ -1,26 +1,40 @@
 """Main Flask application for Nuclear Radiation Monitoring System."""
 
-from flask import Flask, render_template, request, session, redirect, url_for, send_file, jsonify
+from flask import (
+    Flask, render_template, request, session, redirect, url_for, send_file,
+    send_from_directory, jsonify, abort, g, Response
+)
+import numpy as np
 import pandas as pd
 import os
 import io
+import secrets
+import time
 
-from app.config import PAGE_CONFIG
-from app.utils.location import update_user_location_with_fallback
-from app.utils.data_processor import (
-    process_plant_data,
-    calculate_distances,
-    classify_zones
+from app.config import (
+    PAGE_CONFIG, PLANT_DATA_SETTINGS, MAP_SETTINGS, MAP_CACHE_SETTINGS, BATCH_SETTINGS,
+    RESPONSE_CACHE_SETTINGS, PLANT_UPDATE_SETTINGS, METRICS_SETTINGS, PROFILING_SETTINGS,
+    TRACKING_SETTINGS
 )
-from app.utils.map_utils import (
-    create_map,
-    add_plant_markers,
-    add_user_marker
+from app.utils.location import (
+    update_user_location_with_fallback, client_ip, get_geolocation_service
+)
+from app.utils.plant_store import PlantStore
+from app.utils.proximity import compute_proximity, batch_proximity, patch_proximity
+from app.utils.result_cache import ResultCache, cell_center, location_key
+from app.utils.map_cache import MapFileCache
+from app.utils.plant_query import PlantQuery, QUERY_PARAMS, run_query, plant_rows
+from app.utils.http_cache import (
+    EncodedBody, etag_for, is_not_modified, not_modified_response,
+    preferred_encoding
+)
+from app.utils.notifications import send_notification, dispatcher
+from app.utils.profiling import RequestProfiler
+from app.utils.tracking import LocationTracker, sse_message
+from app.utils.geofence import GeofenceEngine, entered_alert
+from app.utils.metrics import (
+    timed, server_timing_header, stats_metrics, stage_seconds, request_seconds
 )
-from app.utils.notifications import send_notification
-
-# In-memory cache to avoid large cookies (browser session storage has size limits)
-DATA_CACHE = {}
 
 
 def create_app():
@@ -33,140 +47,192 @@ def create_app():
                 static_url_path='/static')
     app.secret_key = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
     
-    # Create maps directory if it doesn't exist
-    os.makedirs(os.path.join(base_dir, 'static', 'maps'), exist_ok=True)
+    # Load and process the plant dataset once; requests share the snapshot
+    plant_store = PlantStore(os.path.join(base_dir, PLANT_DATA_SETTINGS["path"]))
+    app.extensions['plant_store'] = plant_store
+    
+    # Per-location results shared by users in the same location cell
+    result_cache = ResultCache(size_of=lambda proximity: proximity.estimated_size)
+    app.extensions['result_cache'] = result_cache
+    
+    # Serialized (and compressed) /get_data bodies, so repeat calls skip jsonify
+    response_cache = ResultCache(
+        max_entries=RESPONSE_CACHE_SETTINGS["max_entries"],
+        max_bytes=RESPONSE_CACHE_SETTINGS["max_bytes"],
+        size_of=lambda body: body.size
+    )
+    app.extensions['response_cache'] = response_cache
+    
+    # Plant layers are rendered once per dataset version; users only fetch an overlay
+    maps_dir = os.path.join(base_dir, MAP_CACHE_SETTINGS["directory"])
+    map_cache = MapFileCache(maps_dir)
+    app.extensions['map_cache'] = map_cache
+    
+    # Live location tracking state and event streams, per session
+    tracker = LocationTracker()
+    app.extensions['tracker'] = tracker
+    
+    # Per-session geofence state, so alerts fire on entering a zone rather than on every reload
+    geofences = GeofenceEngine()
+    app.extensions['geofences'] = geofences
+    
+    # Requests presenting the profiling token are profiled to files (off unless the token is set)
+    profile_token = os.environ.get(PROFILING_SETTINGS["token_env"])
+    if profile_token:
+        app.wsgi_app = RequestProfiler(
+            app.wsgi_app, profile_token, os.path.join(base_dir, PROFILING_SETTINGS["directory"])
+        )
+    
+    def get_result(snapshot, user_latitude, user_longitude):
+        """Return the (possibly shared) proximity result for a location against a snapshot."""
+        key = location_key(snapshot.version, user_latitude, user_longitude)
+        def compute():
+            with timed('proximity_compute'):
+                return compute_proximity(snapshot.df, *cell_center(key), snapshot.index)
+        
+        return result_cache.get_or_compute(key, compute)
+    
+    def get_base_map(snapshot):
+        """Return the filename of the snapshot's base map, rendering it on first use."""
+        overlay_url = url_for('map_overlay')
+        plants_url = url_for('plants_in_bbox')
+        # Viewport maps fetch plants at runtime, so plant changes never stale them
+        map_version = None if MAP_SETTINGS["plant_layer"] == 'viewport' else snapshot.version
+        map_filename = MapFileCache.filename_for(
+            map_version,
+            settings={'map': MAP_SETTINGS, 'overlay_url': overlay_url, 'plants_url': plants_url}
+        )
+        
+        def render(path):
+            # folium is imported on the first render, not at worker startup
+            from app.utils.map_utils import create_base_map
+            
+            with timed('map_build'):
+                map_obj = create_base_map(snapshot.df, overlay_url, plants_url)
+            with timed('map_save'):
+                map_obj.save(path)
+        
+        return map_cache.get_or_render(map_filename, render)
+    
+    def apply_plant_changes(upserts, deletes):
+        """Apply plant changes and carry the caches over to the new version."""
+        snapshot, change = plant_store.apply_changes(upserts, deletes)
+        # Results for the previous version are patched row by row, not recomputed
+        def migrate(key, proximity):
+            if key[0] != change.previous_version:
+                return None
+            return ((change.version,) + key[1:],
+                    patch_proximity(proximity, snapshot.df, change, snapshot.index))
+        
+        result_cache.migrate(migrate)
+        # Serialized bodies embed the whole plant list
+        response_cache.clear()
+        return snapshot
+    
+    def plant_update_error():
+        """Return an error response unless the request may change plants."""
+        token = os.environ.get(PLANT_UPDATE_SETTINGS["token_env"])
+        if not app.config.get('PLANT_UPDATES_ENABLED', True):
+            return jsonify({'error': 'Plant updates are disabled with several worker processes'}), 403
+        if not token:
+            return jsonify({'error': 'Plant updates are disabled'}), 403
+        if request.headers.get('Authorization') != f'Bearer {token}':
+            return jsonify({'error': 'Invalid or missing token'}), 401
+        return None
+    
+    def tracking_subject():
+        """Return the session's tracking ID, assigning one on first use."""
+        if 'tracking_id' not in session:
+            session['tracking_id'] = secrets.token_urlsafe(16)
+        return session['tracking_id']
     
     def load_and_process_data():
-        """Load data from data/data2.csv and process it."""
+        """Process the current plant snapshot for the user's location."""
         try:
-            # Get the path to data/data2.csv
-            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-            data_path = os.path.join(base_dir, 'data', 'data2.csv')
-            
-            # Load and process data
-            df = pd.read_csv(data_path)
-            
-            # Handle the first empty column if it exists
-            if df.columns[0].strip() == '' or df.columns[0] == 'Unnamed: 0':
-                df = df.drop(df.columns[0], axis=1)
-            
-            # Ensure we have the required columns (Name, Latitude, Longitude, Age)
-            # If Age column doesn't exist or has issues, calculate it from OperationalFrom
-            if 'Age' not in df.columns:
-                df['Age'] = 0
-            
-            # Fill NaN values in Age column
-            if df['Age'].isna().any():
-                # Try to calculate age from OperationalFrom if available
-                if 'OperationalFrom' in df.columns:
-                    from datetime import datetime
-                    current_year = datetime.now().year
-                    def calculate_age(x):
-                        if pd.isna(x):
-                            return 0
-                        try:
-                            # Try to extract year from date string
-                            date_str = str(x)
-                            if len(date_str) >= 4:
-                                year = int(date_str[:4])
-                                return max(0, current_year - year)
-                        except:
-                            pass
-                        return 0
-                    df['Age'] = df.apply(
-                        lambda row: row['Age'] if pd.notna(row['Age']) and row['Age'] > 0 
-                        else calculate_age(row.get('OperationalFrom', 0)), 
-                        axis=1
-                    )
-                else:
-                    df['Age'] = df['Age'].fillna(0)
-            
-            # Ensure Age is numeric
-            df['Age'] = pd.to_numeric(df['Age'], errors='coerce').fillna(0)
-            
-            # Filter to only required columns
-            required_cols = ['Name', 'Latitude', 'Longitude', 'Age']
-            # Check if all required columns exist
-            missing_cols = [col for col in required_cols if col not in df.columns]
-            if missing_cols:
-                raise ValueError(f"Missing required columns: {missing_cols}")
-            
-            df = df[required_cols].copy()
-            
-            # Add a reference plant near Prayagraj / Allahabad for demo alerts
-            prayagraj_plant = {
-                'Name': 'Prayagraj Research Reactor',
-                'Latitude': 25.4358,
-                'Longitude': 81.8463,
-                'Age': 22  # Moderate by default thresholds
-            }
-            df = pd.concat([df, pd.DataFrame([prayagraj_plant])], ignore_index=True)
-            
-            # Remove rows with missing essential data
-            df = df.dropna(subset=['Name', 'Latitude', 'Longitude'])
-            
-            df = process_plant_data(df)
+            with timed('snapshot'):
+                snapshot = plant_store.snapshot()
             
             # Get user location
-            user_latitude, user_longitude = update_user_location_with_fallback()
-            
-            # Calculate distances and classify zones
-            plant_distances = calculate_distances(df, user_latitude, user_longitude)
-            safe_zones, moderate_zones, dangerous_zones = classify_zones(
-                df, user_latitude, user_longitude
-            )
-            # Detect if user is on-site (within 1km of any plant)
-            on_site_plants = [
-                plant['Name'] for plant in plant_distances
-                if plant.get('Distance') is not None and plant['Distance'] <= 1
-            ]
-            
-            # Create map
-            map_obj = create_map(user_latitude, user_longitude)
-            add_plant_markers(map_obj, df)
-            add_user_marker(map_obj, user_latitude, user_longitude, on_site_plants)
-            
-            # Save map to HTML
-            map_filename = f"map_{session.get('map_id', 0)}.html"
-            map_path = os.path.join(base_dir, 'static', 'maps', map_filename)
-            map_obj.save(map_path)
-            session['map_filename'] = map_filename
-            session['map_id'] = session.get('map_id', 0) + 1
+            with timed('geolocation'):
+                user_latitude, user_longitude = update_user_location_with_fallback(
+                    client_ip(request)
+                )
+            session['location'] = [user_latitude, user_longitude]
             
-            # Send notifications
-            if dangerous_zones:
-                send_notification('dangerous', dangerous_zones)
-            elif moderate_zones:
-                send_notification('moderate', moderate_zones)
-            elif safe_zones:
-                send_notification('safe', safe_zones)
+            with timed('proximity'):
+                proximity = get_result(snapshot, user_latitude, user_longitude)
+            with timed('map'):
+                map_filename = get_base_map(snapshot)
             
-            # Store data in memory cache (avoid oversized cookies)
-            DATA_CACHE['df_data'] = df.to_dict('records')
-            DATA_CACHE['plant_distances'] = plant_distances
-            DATA_CACHE['safe_zones'] = safe_zones
-            DATA_CACHE['moderate_zones'] = moderate_zones
-            DATA_CACHE['dangerous_zones'] = dangerous_zones
-            DATA_CACHE['user_latitude'] = user_latitude
-            DATA_CACHE['user_longitude'] = user_longitude
-            DATA_CACHE['on_site_plants'] = on_site_plants
-            DATA_CACHE['map_filename'] = map_filename
+            # Notify only on newly entered zones; hysteresis keeps boundary jitter quiet
+            with timed('geofence'):
+                events = geofences.update(tracking_subject(), snapshot,
+                                          user_latitude, user_longitude)
+            level, plants = entered_alert(events)
+            # Off under several workers: their separate geofence states would each notify once
+            if level and app.config.get('GEOFENCE_NOTIFICATIONS_ENABLED', True):
+                with timed('notify'):
+                    send_notification(level, plants)
             
             return {
                 'success': True,
-                'total_plants': len(df),
-                'safe_count': len(df[df['Safety'] == 'Safe']),
-                'moderate_count': len(df[df['Safety'] == 'Moderate']),
-                'dangerous_count': len(df[df['Safety'] == 'Dangerous']),
-                'safe_zones': safe_zones,
-                'moderate_zones': moderate_zones,
-                'dangerous_zones': dangerous_zones,
+                'total_plants': len(snapshot),
+                'safe_count': snapshot.safety_counts['Safe'],
+                'moderate_count': snapshot.safety_counts['Moderate'],
+                'dangerous_count': snapshot.safety_counts['Dangerous'],
+                'safe_zones': proximity.safe_zones,
+                'moderate_zones': proximity.moderate_zones,
+                'dangerous_zones': proximity.dangerous_zones,
                 'map_filename': map_filename,
-                'on_site_plants': on_site_plants
+                'map_url': url_for('serve_map', filename=map_filename),
+                'on_site_plants': proximity.on_site_plants
             }
         except Exception as e:
             return {'error': f'Error processing data: {str(e)}'}
     
+    if METRICS_SETTINGS["enabled"]:
+        @app.before_request
+        def start_request_timer():
+            g.request_started = time.perf_counter()
+        
+        @app.after_request
+        def record_request_timing(response):
+            """Observe request latency and report stage timings in Server-Timing."""
+            started = g.get('request_started')
+            if started is None:
+                return response
+            elapsed = time.perf_counter() - started
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            request_seconds.observe(elapsed, endpoint, request.method, str(response.status_code))
+            response.headers['Server-Timing'] = server_timing_header(
+                g.get('stage_timings', {}), total=elapsed
+            )
+            return response
+        
+        @app.route(METRICS_SETTINGS["path"])
+        def metrics():
+            """Expose latency histograms and cache counters in Prometheus text format."""
+            snapshot = plant_store.snapshot()
+            lines = request_seconds.render() + stage_seconds.render()
+            lines += stats_metrics('nuclalert_result_cache', 'Proximity result cache',
+                                   result_cache.stats())
+            lines += stats_metrics('nuclalert_response_cache', 'Serialized response cache',
+                                   response_cache.stats())
+            lines += stats_metrics('nuclalert_map_cache', 'Rendered map file cache',
+                                   map_cache.stats())
+            lines += stats_metrics('nuclalert_geolocation', 'IP geolocation service',
+                                   get_geolocation_service().stats())
+            lines += stats_metrics('nuclalert_notifications', 'Notification dispatcher',
+                                   dispatcher.stats())
+            lines += stats_metrics('nuclalert_tracking', 'Live location tracking',
+                                   tracker.stats())
+            lines += stats_metrics('nuclalert_geofence', 'Geofence engine',
+                                   geofences.stats())
+            lines += stats_metrics('nuclalert_plants', 'Plant snapshot',
+                                   {'loaded': len(snapshot)})
+            return Response('\n'.join(lines) + '\n',
+                            content_type='text/plain; version=0.0.4; charset=utf-8')
+    
     @app.route('/')
     def index():
         """Main index page - shows intro or dashboard."""
@@ -177,10 +243,11 @@ def create_app():
             return render_template('intro.html', PAGE_CONFIG=PAGE_CONFIG)
         
         # Load and process data automatically
-        if 'df_data' not in session:
+        if 'location' not in session:
             load_and_process_data()
         
-        return render_template('dashboard.html', PAGE_CONFIG=PAGE_CONFIG)
+        return render_template('dashboard.html', PAGE_CONFIG=PAGE_CONFIG,
+                               TRACKING_STREAM=TRACKING_SETTINGS["stream_enabled"])
     
     @app.route('/skip_intro', methods=['POST'])
     def skip_intro():
@@ -200,20 +267,305 @@ def create_app():
     
     @app.route('/get_data')
     def get_data():
-        """Get processed data for display."""
-        if 'df_data' not in DATA_CACHE:
+        """
+        Get processed data for display.
+        
+        Without query parameters the full plant list and distance table are
+        returned. With any of limit, offset, sort, safety, country, status or
+        nearest, only the requested page of plants (with distances) and the
+        k nearest plants are returned.
+        """
+        if 'location' not in session:
             return jsonify({'error': 'No data available'}), 404
         
+        query = None
+        if any(param in request.args for param in QUERY_PARAMS):
+            try:
+                query = PlantQuery.from_args(request.args)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
+        with timed('snapshot'):
+            snapshot = plant_store.snapshot()
+        key = location_key(snapshot.version, *session['location'])
+        with timed('map'):
+            map_filename = get_base_map(snapshot)
+        tag = etag_for(key, map_filename, query)
+        # The tag is known before any work, so a current client costs no serialization
+        if is_not_modified(request, tag):
+            return not_modified_response(tag, preferred_encoding(request))
+        
+        def serialize():
+            with timed('proximity'):
+                proximity = get_result(snapshot, *session['location'])
+            payload = {
+                'total_plants': len(snapshot),
+                'safe_count': snapshot.safety_counts['Safe'],
+                'moderate_count': snapshot.safety_counts['Moderate'],
+                'dangerous_count': snapshot.safety_counts['Dangerous'],
+                'safe_zones': proximity.safe_zones,
+                'moderate_zones': proximity.moderate_zones,
+                'dangerous_zones': proximity.dangerous_zones,
+                'map_filename': map_filename,
+                'map_url': url_for('serve_map', filename=map_filename),
+                'on_site_plants': proximity.on_site_plants
+            }
+            if query is None:
+                payload['plants'] = snapshot.records
+                payload['distances'] = proximity.plant_distances
+            else:
+                distances = proximity.distances
+                if len(distances) != len(snapshot):
+                    distances = np.full(len(snapshot), np.inf)
+                page, total, nearest = run_query(snapshot.df, distances, query)
+                payload.update({
+                    'plants': plant_rows(snapshot.records, distances, page),
+                    'nearest': plant_rows(snapshot.records, distances, nearest),
+                    'total': total,
+                    'offset': query.offset,
+                    'limit': query.limit,
+                    'sort': query.sort
+                })
+            with timed('encode'):
+                return EncodedBody(payload, tag)
+        
+        cache_key = (key, map_filename, query)
+        with timed('serialize'):
+            body = response_cache.get_or_compute(cache_key, serialize)
+        response = body.make_response(request)
+        # The response may have added a compressed variant to the cached body
+        response_cache.resize(cache_key, body)
+        return response
+    
+    @app.route('/maps/<filename>')
+    def serve_map(filename):
+        """Serve a content-addressed map file with immutable cache headers."""
+        if not MapFileCache.is_valid_filename(filename):
+            abort(404)
+        response = send_from_directory(maps_dir, filename, max_age=MAP_CACHE_SETTINGS["http_max_age"])
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+    
+    @app.route('/api/plants')
+    def plants_in_bbox():
+        """Plants inside a bounding box (?bbox=west,south,east,north) as compact rows."""
+        from app.utils.map_utils import compact_plant_rows, PLANT_ROW_FIELDS, SAFETY_LEVELS
+        
+        snapshot = plant_store.snapshot()
+        bbox = request.args.get('bbox')
+        if bbox:
+            try:
+                west, south, east, north = (float(v) for v in bbox.split(','))
+            except ValueError:
+                return jsonify({'error': "'bbox' must be west,south,east,north"}), 400
+            positions = snapshot.index.query_bbox(south, west, north, east)
+        else:
+            positions = np.arange(len(snapshot))
+        
+        limit = MAP_SETTINGS["viewport_max_plants"]
+        return jsonify({
+            'dataset_version': snapshot.version,
+            'fields': PLANT_ROW_FIELDS,
+            'safety_levels': SAFETY_LEVELS,
+            'rows': compact_plant_rows(snapshot.df, positions[:limit]),
+            'truncated': len(positions) > limit
+        })
+    
+    @app.route('/api/plants/<plant_id>', methods=['PUT', 'DELETE'])
+    def update_plant(plant_id):
+        """Upsert (PUT, JSON fields) or delete one plant by its stable ID."""
+        error = plant_update_error()
+        if error:
+            return error
+        
+        if request.method == 'DELETE':
+            try:
+                snapshot = apply_plant_changes({}, [plant_id])
+            except KeyError:
+                return jsonify({'error': f'Unknown plant {plant_id}'}), 404
+            return jsonify({'dataset_version': snapshot.version, 'deleted': plant_id})
+        
+        fields = request.get_json(silent=True)
+        if not isinstance(fields, dict):
+            return jsonify({'error': 'Body must be a JSON object of plant fields'}), 400
+        try:
+            snapshot = apply_plant_changes({plant_id: fields}, [])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({
+            'dataset_version': snapshot.version,
+            'plant': snapshot.records[snapshot.positions[plant_id]]
+        })
+    
+    @app.route('/api/plants/changes', methods=['POST'])
+    def update_plants():
+        """Apply a batch of plant changes: {"upserts": {id: fields}, "deletes": [id, ...]}."""
+        error = plant_update_error()
+        if error:
+            return error
+        
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': "Body must be a JSON object with 'upserts' and 'deletes'"}), 400
+        upserts = payload.get('upserts') or {}
+        deletes = payload.get('deletes') or []
+        if not isinstance(upserts, dict) or not all(isinstance(f, dict) for f in upserts.values()):
+            return jsonify({'error': "'upserts' must map plant IDs to field objects"}), 400
+        if not isinstance(deletes, list) or not all(isinstance(i, str) for i in deletes):
+            return jsonify({'error': "'deletes' must be an array of plant IDs"}), 400
+        if len(upserts) + len(deletes) > PLANT_UPDATE_SETTINGS["max_changes"]:
+            return jsonify({'error': f"At most {PLANT_UPDATE_SETTINGS['max_changes']} changes per request"}), 400
+        
+        try:
+            snapshot = apply_plant_changes(upserts, deletes)
+        except KeyError as e:
+            return jsonify({'error': f'Unknown plant {e.args[0]}'}), 404
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         return jsonify({
-            'plants': DATA_CACHE.get('df_data', []),
-            'distances': DATA_CACHE.get('plant_distances', []),
-            'safe_zones': DATA_CACHE.get('safe_zones', []),
-            'moderate_zones': DATA_CACHE.get('moderate_zones', []),
-            'dangerous_zones': DATA_CACHE.get('dangerous_zones', []),
-            'map_filename': DATA_CACHE.get('map_filename', ''),
-            'on_site_plants': DATA_CACHE.get('on_site_plants', [])
+            'dataset_version': snapshot.version,
+            'upserted': len(upserts),
+            'deleted': len(deletes),
+            'total_plants': len(snapshot)
         })
     
+    @app.route('/map_overlay')
+    def map_overlay():
+        """Per-user map overlay (marker, radius and on-site popup) as JSON."""
+        from app.utils.map_utils import build_user_overlay
+        
+        if 'location' not in session:
+            return jsonify({})
+        
+        user_latitude, user_longitude = session['location']
+        proximity = get_result(plant_store.snapshot(), user_latitude, user_longitude)
+        return jsonify(build_user_overlay(
+            user_latitude, user_longitude, proximity.on_site_plants
+        ))
+    
+    @app.route('/api/proximity', methods=['POST'])
+    def batch_proximity_api():
+        """Score an array of lat/lon points against the plant table in one batch."""
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            return jsonify({'error': "Body must be a JSON object with 'points'"}), 400
+        points = payload.get('points')
+        if not isinstance(points, list) or not points:
+            return jsonify({'error': "'points' must be a non-empty array"}), 400
+        if len(points) > BATCH_SETTINGS["max_points"]:
+            return jsonify({'error': f"At most {BATCH_SETTINGS['max_points']} points per request"}), 400
+        
+        try:
+            nearest = int(payload.get('nearest', BATCH_SETTINGS["default_nearest"]))
+        except (TypeError, ValueError, OverflowError):
+            return jsonify({'error': "'nearest' must be an integer"}), 400
+        nearest = max(0, min(nearest, BATCH_SETTINGS["max_nearest"]))
+        
+        ids, latitudes, longitudes = [], [], []
+        for i, point in enumerate(points):
+            try:
+                if isinstance(point, dict):
+                    latitude, longitude = float(point['latitude']), float(point['longitude'])
+                else:
+                    latitude, longitude = float(point[0]), float(point[1])
+            except (KeyError, IndexError, TypeError, ValueError):
+                return jsonify({'error': f'Point {i} must have numeric latitude and longitude'}), 400
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                return jsonify({'error': f'Point {i} is out of range'}), 400
+            ids.append(point.get('id') if isinstance(point, dict) else None)
+            latitudes.append(latitude)
+            longitudes.append(longitude)
+        
+        snapshot = plant_store.snapshot()
+        batch = batch_proximity(
+            latitudes, longitudes,
+            snapshot.latitudes, snapshot.longitudes, snapshot.safety,
+            nearest=nearest, raster=snapshot.raster
+        )
+        
+        names = snapshot.names
+        results = []
+        for i in range(len(points)):
+            on_site = names[batch.plants_for(batch.on_site_hits, i)].tolist()
+            result = {
+                'latitude': latitudes[i],
+                'longitude': longitudes[i],
+                'nearest': [
+                    {'Name': names[j], 'Distance': distance, 'Safety': snapshot.safety[j]}
+                    for j, distance in zip(batch.nearest_indices[i].tolist(),
+                                           batch.nearest_distances[i].tolist())
+                ],
+                'safe_zones': names[batch.plants_for(batch.zone_hits['Safe'], i)].tolist(),
+                'moderate_zones': names[batch.plants_for(batch.zone_hits['Moderate'], i)].tolist(),
+                'dangerous_zones': names[batch.plants_for(batch.zone_hits['Dangerous'], i)].tolist(),
+                'on_site': bool(on_site),
+                'on_site_plants': on_site
+            }
+            if ids[i] is not None:
+                result['id'] = ids[i]
+            results.append(result)
+        
+        return jsonify({'dataset_version': snapshot.version, 'results': results})
+    
+    @app.route('/api/track', methods=['POST'])
+    def track_location():
+        """Record a location update; zone changes are also pushed to the session's stream."""
+        payload = request.get_json(silent=True) or {}
+        try:
+            latitude, longitude = float(payload['latitude']), float(payload['longitude'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': "'latitude' and 'longitude' must be numbers"}), 400
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return jsonify({'error': 'Location is out of range'}), 400
+        
+        subject = tracking_subject()
+        snapshot = plant_store.snapshot()
+        with timed('tracking'):
+            update = tracker.update(subject, snapshot, latitude, longitude)
+        with timed('geofence'):
+            events = [event.to_dict() for event in
+                      geofences.update(subject, snapshot, latitude, longitude)]
+        if events:
+            tracker.publish(subject, 'geofence', events)
+        if update.mode != 'skipped':
+            session['location'] = [latitude, longitude]
+        return jsonify({
+            'mode': update.mode,
+            'recomputed_plants': update.candidates,
+            'changed': update.changed,
+            'zones': update.event,
+            'geofence_events': events
+        })
+    
+    @app.route('/api/track/stream')
+    def track_stream():
+        """Server-Sent Events stream of zone changes and geofence events for this session."""
+        if not TRACKING_SETTINGS["stream_enabled"]:
+            abort(404)
+        subject = tracking_subject()
+        last_event_id = request.headers.get('Last-Event-ID')
+        deadline = time.monotonic() + TRACKING_SETTINGS["stream_seconds"]
+        
+        def events():
+            # Subscribed inside the generator, so the finally block always unsubscribes
+            subscription = tracker.subscribe(subject)
+            try:
+                latest = tracker.latest(subject)
+                if latest is not None and str(latest['id']) != last_event_id:
+                    yield sse_message('zones', latest, latest['id'])
+                while time.monotonic() < deadline:
+                    event = subscription.get(timeout=TRACKING_SETTINGS["heartbeat_seconds"])
+                    if event is None:
+                        yield ': keepalive\n\n'
+                    else:
+                        yield sse_message(*event)
+            finally:
+                tracker.unsubscribe(subject, subscription)
+        
+        return Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
     @app.route('/download_processed')
     def download_processed():
         """Download processed data as CSV."""
@@ -1,7 +1,11 @@
 """Data processing utilities for nuclear plant data."""
 
+from datetime import datetime
+
+import numpy as np
 import pandas as pd
-from geopy.distance import geodesic
+from app.utils.distance import distances_km
+from app.utils.spatial_index import PlantGridIndex
 from app.config import (
     SAFETY_THRESHOLDS,
     DISTANCE_THRESHOLDS,
@@ -29,6 +33,80 @@ def calculate_safety(age):
         return 'Dangerous'
 
 
+# Safety levels in severity order; 'Unknown' marks plants without a usable age
+SAFETY_CATEGORIES = ['Safe', 'Moderate', 'Dangerous', 'Unknown']
+
+# OperationalFrom dates in the registry are day-first (dd-mm-yyyy)
+OPERATIONAL_FROM_FORMAT = '%d-%m-%Y'
+
+
+def classify_safety(ages):
+    """
+    Classify many plant ages at once, binning them with SAFETY_THRESHOLDS.
+    
+    Same rules as calculate_safety, applied to a whole column.
+    
+    Args:
+        ages: Sequence or Series of plant ages in years
+        
+    Returns:
+        Series: Categorical safety classification with SAFETY_CATEGORIES
+    """
+    ages = pd.to_numeric(pd.Series(ages), errors='coerce')
+    safety = pd.cut(
+        ages,
+        bins=[-np.inf, SAFETY_THRESHOLDS["safe_age"], SAFETY_THRESHOLDS["moderate_age"], np.inf],
+        right=False,
+        labels=SAFETY_CATEGORIES[:3]
+    )
+    safety = safety.cat.set_categories(SAFETY_CATEGORIES)
+    # Ages past the last finite bin edge are still Dangerous
+    safety[ages == np.inf] = 'Dangerous'
+    return safety.fillna('Unknown')
+
+
+def operational_years(operational_from):
+    """
+    Parse OperationalFrom dates into years.
+    
+    Args:
+        operational_from: Sequence of date strings
+        
+    Returns:
+        numpy.ndarray: Years as floats, NaN where no year could be parsed
+    """
+    values = pd.Series(operational_from, dtype='object').astype(str).str.strip()
+    years = pd.to_datetime(values, format=OPERATIONAL_FROM_FORMAT, errors='coerce').dt.year
+    leading_year = pd.to_numeric(values.str.extract(r'^(\d{4})', expand=False), errors='coerce')
+    return years.astype('float64').fillna(leading_year).to_numpy(dtype=np.float64)
+
+
+def derive_ages(operational_from, current_year=None):
+    """
+    Derive plant ages from OperationalFrom dates in one pass.
+    
+    Dates are parsed in bulk as dd-mm-yyyy; values in any other shape fall
+    back to a leading four-digit year (ISO dates, bare years). Registries
+    repeat the same dates many times, so only distinct values are parsed.
+    
+    Args:
+        operational_from: Sequence or Series of date strings (NaN allowed)
+        current_year: Year ages are measured to (defaults to this year)
+        
+    Returns:
+        Series: Ages in whole years, 0 where no year could be parsed
+    """
+    current_year = current_year or datetime.now().year
+    operational_from = pd.Series(operational_from)
+    codes, uniques = pd.factorize(operational_from)
+    years = operational_years(uniques)
+
+    ages = np.zeros(len(codes))
+    known = codes >= 0
+    ages[known] = np.clip(current_year - years[codes[known]], 0, None)
+    return pd.Series(np.nan_to_num(ages), index=operational_from.index)
+
+
 def process_plant_data(df):
     """
     Process and enrich plant data with safety classifications.
@@ -37,14 +115,32 @@ def process_plant_data(df):
         df: DataFrame with plant data (Name, Latitude, Longitude, Age)
         
     Returns:
-        DataFrame: Processed dataframe with Safety column
+        DataFrame: Processed dataframe with a categorical Safety column
     """
     df = df.copy()
     df.fillna(0, inplace=True)
-    df['Safety'] = df['Age'].apply(calculate_safety)
+    df['Safety'] = classify_safety(df['Age'])
     return df
 
 
+def plant_distances_km(df, user_latitude, user_longitude):
+    """
+    Calculate distances from user location to all plants in one array operation.
+    
+    Args:
+        df: DataFrame with plant data
+        user_latitude: User's latitude
+        user_longitude: User's longitude
+        
+    Returns:
+        numpy.ndarray: Distances in km, aligned with the rows of df
+    """
+    return distances_km(
+        user_latitude, user_longitude,
+        df['Latitude'].to_numpy(), df['Longitude'].to_numpy()
+    )
+
+
 def calculate_distances(df, user_latitude, user_longitude):
     """
     Calculate distances from user location to all plants.
@@ -57,36 +153,45 @@ def calculate_distances(df, user_latitude, user_longitude):
     Returns:
         list: List of dictionaries with plant distance information
     """
-    plant_distances = []
+    if not (user_latitude and user_longitude):
+        return []
     
-    if user_latitude and user_longitude:
-        for _, row in df.iterrows():
-            plant_latitude = row['Latitude']
-            plant_longitude = row['Longitude']
-            
-            distance = geodesic(
-                (user_latitude, user_longitude),
-                (plant_latitude, plant_longitude)
-            ).km
-            
-            plant_distances.append({
-                'Name': row['Name'],
-                'Distance': distance,
-                'Safety': row['Safety'],
-                'Age': row['Age']
-            })
+    distances = plant_distances_km(df, user_latitude, user_longitude)
+    return distance_records(df, distances)
+
+
+def distance_records(df, distances):
+    """
+    Build the per-plant distance table from a precomputed distance array.
     
-    return plant_distances
+    Args:
+        df: DataFrame with plant data
+        distances: Distances in km aligned with the rows of df
+        
+    Returns:
+        list: List of dictionaries with plant distance information
+    """
+    return [
+        {'Name': name, 'Distance': distance, 'Safety': safety, 'Age': age}
+        for name, distance, safety, age in zip(
+            df['Name'].tolist(), distances.tolist(),
+            df['Safety'].tolist(), df['Age'].tolist()
+        )
+    ]
 
 
-def classify_zones(df, user_latitude, user_longitude):
+def classify_zones(df, user_latitude, user_longitude, index=None):
     """
     Classify plants into safety zones based on distance and safety level.
     
+    Only plants returned by a radius query on the spatial index are
+    measured, so the cost scales with the number of nearby plants.
+    
     Args:
         df: DataFrame with plant data
         user_latitude: User's latitude
         user_longitude: User's longitude
+        index: Optional PlantGridIndex built over df (built on demand if omitted)
         
     Returns:
         tuple: (safe_zones, moderate_zones, dangerous_zones) lists
@@ -95,23 +200,24 @@ def classify_zones(df, user_latitude, user_longitude):
     moderate_zones = []
     dangerous_zones = []
     
-    if user_latitude and user_longitude:
-        for _, row in df.iterrows():
-            plant_latitude = row['Latitude']
-            plant_longitude = row['Longitude']
-            safety = row['Safety']
-            
-            distance = geodesic(
-                (user_latitude, user_longitude),
-                (plant_latitude, plant_longitude)
-            ).km
-            
-            if safety == 'Safe' and distance <= DISTANCE_THRESHOLDS["safe_zone"]:
-                safe_zones.append(row['Name'])
-            elif safety == 'Moderate' and distance <= DISTANCE_THRESHOLDS["moderate_zone"]:
-                moderate_zones.append(row['Name'])
-            elif safety == 'Dangerous' and distance <= DISTANCE_THRESHOLDS["dangerous_zone"]:
-                dangerous_zones.append(row['Name'])
+    if not (user_latitude and user_longitude):
+        return safe_zones, moderate_zones, dangerous_zones
+    
+    if index is None:
+        index = PlantGridIndex.from_dataframe(df)
+    
+    positions, distances = index.query_radius(
+        user_latitude, user_longitude, max(DISTANCE_THRESHOLDS.values())
+    )
+    names = df['Name'].to_numpy()[positions]
+    safeties = df['Safety'].to_numpy()[positions]
+    
+    for name, safety, distance in zip(names.tolist(), safeties.tolist(), distances.tolist()):
+        if safety == 'Safe' and distance <= DISTANCE_THRESHOLDS["safe_zone"]:
+            safe_zones.append(name)
+        elif safety == 'Moderate' and distance <= DISTANCE_THRESHOLDS["moderate_zone"]:
+            moderate_zones.append(name)
+        elif safety == 'Dangerous' and distance <= DISTANCE_THRESHOLDS["dangerous_zone"]:
+            dangerous_zones.append(name)
     
     return safe_zones, moderate_zones, dangerous_zones
-
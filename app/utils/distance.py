@@ -0,0 +1,61 @@
+"""Vectorized distance engine for user-to-plant distance calculations."""
+
+import numpy as np
+
+# WGS-84 ellipsoid (the same model geopy's geodesic uses)
+WGS84_A_KM = 6378.137
+WGS84_F = 1 / 298.257223563
+
+
+def distances_km(latitude, longitude, latitudes, longitudes):
+    """
+    Calculate ellipsoidal distances between points in one array operation.
+
+    Uses Lambert's formula on the WGS-84 ellipsoid. Compared with geopy's
+    geodesic the error is under 1 m up to a few hundred kilometres (about
+    1.5 ppm), so it is negligible at the distances we alert on, and about
+    10 m at 7,000 km. It grows near antipodal points: within a degree or
+    so of the antipode distances can be off by kilometres to tens of
+    kilometres (up to ~0.15%). Inputs broadcast against each other, so a single user location can be
+    scored against every plant, or an (m, 1) column of locations against
+    an (n,) row of plants.
+
+    Args:
+        latitude: Origin latitude(s) in degrees
+        longitude: Origin longitude(s) in degrees
+        latitudes: Destination latitude(s) in degrees
+        longitudes: Destination longitude(s) in degrees
+
+    Returns:
+        numpy.ndarray: Distances in kilometres (float64)
+    """
+    lat1 = np.radians(np.asarray(latitude, dtype=np.float64))
+    lon1 = np.radians(np.asarray(longitude, dtype=np.float64))
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+
+    # Reduced (parametric) latitudes
+    beta1 = np.arctan((1 - WGS84_F) * np.tan(lat1))
+    beta2 = np.arctan((1 - WGS84_F) * np.tan(lat2))
+
+    # Central angle on the auxiliary sphere (haversine form, stable for short distances)
+    h = (np.sin((beta2 - beta1) / 2) ** 2
+         + np.cos(beta1) * np.cos(beta2) * np.sin((lon2 - lon1) / 2) ** 2)
+    sigma = 2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    p = (beta1 + beta2) / 2
+    q = (beta2 - beta1) / 2
+    sin_sigma = np.sin(sigma)
+    cos_half = np.cos(sigma / 2) ** 2
+    sin_half = np.sin(sigma / 2) ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = (sigma - sin_sigma) * np.sin(p) ** 2 * np.cos(q) ** 2 / cos_half
+        y = (sigma + sin_sigma) * np.cos(p) ** 2 * np.sin(q) ** 2 / sin_half
+        distance = WGS84_A_KM * (sigma - WGS84_F / 2 * (x + y))
+
+    # Coincident points give 0/0 above and near-antipodal ones blow up;
+    # fall back to zero and the spherical arc respectively. A missing
+    # coordinate stays NaN, so it never compares as inside a radius.
+    distance = np.where(np.isfinite(distance), distance, WGS84_A_KM * sigma)
+    return np.where(np.isnan(sigma), np.nan, np.where(sigma > 0, distance, 0.0))
@@ -0,0 +1,236 @@
+"""Geofence enter/exit events around plants, with hysteresis and per-subject state."""
+
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+import numpy as np
+from app.config import DISTANCE_THRESHOLDS, ON_SITE_DISTANCE_KM, GEOFENCE_SETTINGS
+from app.utils.distance import distances_km
+from app.utils.proximity import ZONE_KEYS
+from app.utils.tracking import zone_radii
+
+
+@dataclass(frozen=True)
+class GeofenceEvent:
+    """A subject entering or leaving one plant's fence."""
+
+    kind: str  # 'enter' or 'exit'
+    fence: str  # 'dangerous', 'moderate', 'safe' or 'on_site'
+    plant_id: str
+    plant: str
+    radius_km: float
+    distance_km: float  # None when the plant was removed from the registry
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class FenceState:
+    """
+    Geofence state of one subject.
+
+    ``watched`` holds the plants that were within reach of a fence when the
+    subject was last rebased at ``anchor``, with a lower bound on each one's
+    current distance. Bounds are exact when a plant is measured and shrink
+    by the distance moved otherwise. ``inside`` maps (plant ID, fence kind)
+    to (row position, fence name, radius) for every fence the subject is in.
+    """
+
+    version: str
+    anchor: tuple
+    position: tuple
+    watched: np.ndarray
+    bounds: np.ndarray
+    radii: np.ndarray
+    inside: dict
+
+
+class GeofenceEngine:
+    """
+    Track which plant fences each subject is inside and emit enter/exit events.
+
+    A fence is entered when the distance drops to its radius and left only
+    once the distance exceeds the radius plus the fence kind's hysteresis,
+    so positions jittering around a boundary do not flap.
+
+    Each update measures only candidate plants: those whose lower-bound
+    distance, after subtracting the distance moved since the previous
+    position, could be within a fence's exit band. Plants outside the
+    watched set are farther than any fence can reach until the subject
+    moves ``rebase_km`` from its anchor, which triggers a rebase around the
+    new position.
+    """
+
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings: Geofence settings (defaults to GEOFENCE_SETTINGS)
+        """
+        settings = settings or GEOFENCE_SETTINGS
+        self.hysteresis_km = dict(settings["hysteresis_km"])
+        self.rebase_km = settings["rebase_km"]
+        self.slack_km = settings["slack_km"]
+        self.max_subjects = settings["max_subjects"]
+        reach = max(max(DISTANCE_THRESHOLDS.values(), default=0) + self.hysteresis_km['zone'],
+                    ON_SITE_DISTANCE_KM + self.hysteresis_km['on_site'])
+        self.watch_radius_km = reach + self.rebase_km + self.slack_km
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.rebases = 0
+        self.measured_plants = 0
+        self.enter_events = 0
+        self.exit_events = 0
+
+    def _candidates(self, bounds, radii):
+        """Indices of watched plants that could be inside a fence or its exit band."""
+        bounds = bounds - self.slack_km
+        return np.flatnonzero(
+            (bounds <= radii + self.hysteresis_km['zone'])
+            | (bounds <= ON_SITE_DISTANCE_KM + self.hysteresis_km['on_site'])
+        )
+
+    def _transitions(self, snapshot, inside, positions, distances, radii):
+        """Apply exact distances to the inside map and return the resulting events."""
+        events = []
+        for position, distance, radius in zip(positions.tolist(), distances.tolist(),
+                                              radii.tolist()):
+            plant_id, name = snapshot.ids[position], snapshot.names[position]
+            fences = (
+                ('zone', snapshot.safety[position].lower(), radius),
+                ('on_site', 'on_site', ON_SITE_DISTANCE_KM),
+            )
+            for kind, fence, fence_radius in fences:
+                key = (plant_id, kind)
+                entry = inside.get(key)
+                if entry is None:
+                    if distance <= fence_radius:  # NaN radius (no zone) never enters
+                        inside[key] = (position, fence, fence_radius)
+                        events.append(GeofenceEvent('enter', fence, plant_id, name,
+                                                    fence_radius, distance))
+                elif distance > entry[2] + self.hysteresis_km[kind]:
+                    del inside[key]
+                    events.append(GeofenceEvent('exit', entry[1], plant_id, name,
+                                                entry[2], distance))
+        return events
+
+    def _rebase(self, snapshot, state, latitude, longitude):
+        """Measure every plant within watch range of a new anchor and carry fences over."""
+        watched, distances = snapshot.index.query_radius(latitude, longitude, self.watch_radius_km)
+        radii = zone_radii(snapshot.safety[watched])
+        inside, events = {}, []
+
+        if state is not None:
+            # Fences are keyed by plant ID, so they survive row moves between versions
+            measured = dict(zip(watched.tolist(), distances.tolist()))
+            for (plant_id, kind), (_, fence, radius) in state.inside.items():
+                position = snapshot.positions.get(plant_id)
+                if position is None:
+                    events.append(GeofenceEvent('exit', fence, plant_id, None, radius, None))
+                elif position not in measured:
+                    # Beyond the watch radius, so far outside the exit band
+                    distance = float(distances_km(latitude, longitude,
+                                                  snapshot.latitudes[position],
+                                                  snapshot.longitudes[position]))
+                    events.append(GeofenceEvent('exit', fence, plant_id, snapshot.names[position],
+                                                radius, distance))
+                elif kind == 'zone' and fence != snapshot.safety[position].lower():
+                    # The plant was reclassified: leave the old zone, re-enter the new one below
+                    events.append(GeofenceEvent('exit', fence, plant_id, snapshot.names[position],
+                                                radius, measured[position]))
+                else:
+                    inside[(plant_id, kind)] = (position, fence, radius)
+
+        events += self._transitions(snapshot, inside, watched, distances, radii)
+        new_state = FenceState(snapshot.version, (latitude, longitude), (latitude, longitude),
+                               watched, distances, radii, inside)
+        return new_state, events, len(watched)
+
+    def update(self, subject, snapshot, latitude, longitude):
+        """
+        Record a new position for a subject and return the fences it entered or left.
+
+        Args:
+            subject: Subject identifier (e.g. a session's tracking ID)
+            snapshot: Current PlantSnapshot
+            latitude: New latitude in degrees
+            longitude: New longitude in degrees
+
+        Returns:
+            list: GeofenceEvent objects (exits carried over from a rebase first)
+        """
+        with self._lock:
+            state = self._states.get(subject)
+
+        rebase = (state is None or state.version != snapshot.version
+                  or float(distances_km(*state.anchor, latitude, longitude)) > self.rebase_km)
+        if rebase:
+            state, events, measured = self._rebase(snapshot, state, latitude, longitude)
+        else:
+            moved = float(distances_km(*state.position, latitude, longitude))
+            bounds = state.bounds - moved
+            candidates = self._candidates(bounds, state.radii)
+            positions = state.watched[candidates]
+            exact = distances_km(latitude, longitude,
+                                 snapshot.latitudes[positions], snapshot.longitudes[positions])
+            bounds[candidates] = exact
+            inside = dict(state.inside)
+            events = self._transitions(snapshot, inside, positions, exact, state.radii[candidates])
+            state = FenceState(state.version, state.anchor, (latitude, longitude),
+                               state.watched, bounds, state.radii, inside)
+            measured = len(positions)
+
+        with self._lock:
+            self._states[subject] = state
+            self._states.move_to_end(subject)
+            while len(self._states) > self.max_subjects:
+                self._states.popitem(last=False)
+            self.updates += 1
+            self.rebases += rebase
+            self.measured_plants += measured
+            for event in events:
+                if event.kind == 'enter':
+                    self.enter_events += 1
+                else:
+                    self.exit_events += 1
+        return events
+
+    def inside(self, subject):
+        """Return the (plant ID, fence) pairs the subject is currently inside."""
+        with self._lock:
+            state = self._states.get(subject)
+        if state is None:
+            return []
+        return sorted((plant_id, fence) for (plant_id, _), (_, fence, _) in state.inside.items())
+
+    def stats(self):
+        """Return a dict of geofence counters."""
+        with self._lock:
+            return {
+                'subjects': len(self._states),
+                'updates': self.updates,
+                'rebases': self.rebases,
+                'measured_plants': self.measured_plants,
+                'enter_events': self.enter_events,
+                'exit_events': self.exit_events,
+            }
+
+
+def entered_alert(events):
+    """
+    Return the most severe zone level entered in a batch of events and its plants.
+
+    Args:
+        events: GeofenceEvent list from one update
+
+    Returns:
+        tuple: (level, plant names) or (None, []) if no zone was entered
+    """
+    for level in ZONE_KEYS:
+        fence = level.lower()
+        plants = [e.plant for e in events if e.kind == 'enter' and e.fence == fence]
+        if plants:
+            return fence, plants
+    return None, []
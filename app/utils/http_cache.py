@@ -0,0 +1,132 @@
+"""Pre-serialized JSON bodies with strong ETags, conditional GET and compression."""
+
+import gzip
+import hashlib
+import json
+import threading
+
+from flask import Response
+from app.config import RESPONSE_CACHE_SETTINGS
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# Content codings we can produce, in order of preference on equal quality
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def etag_for(*parts):
+    """
+    Derive a strong entity tag from the inputs that determine a response body.
+
+    Args:
+        *parts: JSON-serializable values (dataset version, location key, ...)
+
+    Returns:
+        str: Unquoted tag of 32 hex characters
+    """
+    material = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+
+def preferred_encoding(request):
+    """Return the best content coding the client accepts (None for identity)."""
+    best = request.accept_encodings.best_match(ENCODINGS)
+    return best if best in ENCODINGS else None
+
+
+def is_not_modified(request, tag):
+    """Return True if the request's If-None-Match covers any coding of tag."""
+    return any(
+        request.if_none_match.contains_weak(etag)
+        for etag in [tag] + [f"{tag}-{coding}" for coding in ENCODINGS]
+    )
+
+
+def not_modified_response(tag, encoding=None):
+    """Build a bodyless 304 response carrying the validator headers."""
+    response = Response(status=304)
+    _set_validators(response, f"{tag}-{encoding}" if encoding else tag)
+    return response
+
+
+def _set_validators(response, etag):
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    # Always revalidate; a matching ETag makes that a bodyless 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+
+
+class EncodedBody:
+    """
+    A JSON payload serialized once, with compressed variants built on first use.
+
+    Each content coding gets its own strong ETag (``<tag>`` for identity,
+    ``<tag>-gzip``, ``<tag>-br``) so caches never confuse representations,
+    while a conditional request matching any of them is answered with 304.
+    """
+
+    def __init__(self, payload, tag):
+        """
+        Args:
+            payload: JSON-serializable response payload
+            tag: Strong entity tag from etag_for
+        """
+        self.tag = tag
+        self._variants = {None: json.dumps(payload, separators=(',', ':')).encode()}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        """Bytes held across the variants built so far, for cache budgeting."""
+        return sum(len(body) for body in self._variants.values())
+
+    def etag(self, encoding=None):
+        """Return the strong ETag of one content coding."""
+        return f"{self.tag}-{encoding}" if encoding else self.tag
+
+    def variant(self, encoding=None):
+        """Return the body bytes for a content coding, compressing on first use."""
+        body = self._variants.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self._variants.get(encoding)
+                if body is None:
+                    body = self._compress(self._variants[None], encoding)
+                    self._variants[encoding] = body
+        return body
+
+    @staticmethod
+    def _compress(body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=RESPONSE_CACHE_SETTINGS["brotli_quality"])
+        return gzip.compress(body, compresslevel=RESPONSE_CACHE_SETTINGS["gzip_level"], mtime=0)
+
+    def negotiate(self, request):
+        """Pick the content coding for a request (None for identity)."""
+        if len(self._variants[None]) < RESPONSE_CACHE_SETTINGS["compress_min_bytes"]:
+            return None
+        return preferred_encoding(request)
+
+    def make_response(self, request):
+        """
+        Build the response for a request, honouring If-None-Match and Accept-Encoding.
+
+        Args:
+            request: The current Flask request
+
+        Returns:
+            flask.Response: 304 if the client's copy is current, otherwise the body
+        """
+        encoding = self.negotiate(request)
+        if is_not_modified(request, self.tag):
+            return not_modified_response(self.tag, encoding)
+
+        response = Response(self.variant(encoding), mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        _set_validators(response, self.etag(encoding))
+        return response
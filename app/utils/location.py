@@ -1,9 +1,22 @@
 """Location services for user geolocation."""
 
-import geocoder
+import bisect
+import csv
+import ipaddress
+import logging
 import os
+import threading
 import time
-from app.config import DEFAULT_LOCATION, LOCATION_RETRY_ATTEMPTS, LOCATION_RETRY_DELAY
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from app.config import (
+    DEFAULT_LOCATION,
+    LOCATION_RETRY_ATTEMPTS,
+    LOCATION_RETRY_DELAY,
+    GEOLOCATION_SETTINGS
+)
+
+logger = logging.getLogger(__name__)
 
 
 def get_user_location():
@@ -13,6 +26,8 @@ def get_user_location():
     Returns:
         tuple: (latitude, longitude) or (None, None) if failed
     """
+    import geocoder  # deferred: only needed when IP geolocation is actually used
+    
     max_retries = LOCATION_RETRY_ATTEMPTS
     
     for attempt in range(max_retries):
@@ -28,10 +43,242 @@ def get_user_location():
     return DEFAULT_LOCATION["latitude"], DEFAULT_LOCATION["longitude"]
 
 
-def update_user_location_with_fallback():
+class IPRangeResolver:
+    """
+    Resolve IP addresses from a local IP-range database file.
+    
+    The file is a CSV with ``start_ip,end_ip,latitude,longitude`` columns
+    (addresses in dotted/colon notation or as integers). Lookups are a
+    binary search over the sorted range starts.
+    """
+    
+    def __init__(self, path):
+        """
+        Args:
+            path: Path to the IP-range CSV file
+        """
+        ranges = []
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                ranges.append((
+                    self._to_int(row['start_ip']),
+                    self._to_int(row['end_ip']),
+                    float(row['latitude']),
+                    float(row['longitude'])
+                ))
+        ranges.sort()
+        self._starts = [r[0] for r in ranges]
+        self._ranges = ranges
+    
+    @staticmethod
+    def _to_int(value):
+        value = value.strip()
+        return int(value) if value.isdigit() else int(ipaddress.ip_address(value))
+    
+    def __call__(self, ip):
+        """
+        Look up an IP address.
+        
+        Returns:
+            tuple: (latitude, longitude) or None if no range contains it
+        """
+        address = int(ipaddress.ip_address(ip))
+        i = bisect.bisect_right(self._starts, address) - 1
+        if i >= 0 and address <= self._ranges[i][1]:
+            return self._ranges[i][2], self._ranges[i][3]
+        return None
+
+
+def geocoder_resolver(ip, timeout=None):
+    """
+    Look up an IP address with the geocoder web service.
+    
+    Args:
+        ip: IP address to look up
+        timeout: Request timeout in seconds (defaults to config)
+    
+    Returns:
+        tuple: (latitude, longitude) or None if the lookup found nothing
+    """
+    import geocoder
+    
+    result = geocoder.ip(ip, timeout=timeout or GEOLOCATION_SETTINGS["lookup_timeout_seconds"])
+    if result.latlng:
+        return result.latlng[0], result.latlng[1]
+    return None
+
+
+class GeolocationService:
+    """
+    Resolve client IPs to coordinates with a TTL cache and a hard deadline.
+    
+    A lookup that misses the deadline returns DEFAULT_LOCATION immediately;
+    the lookup keeps running in the background and its answer is cached
+    for the client's next request. Failed lookups are cached for a much
+    shorter time, and once ``max_pending`` lookups are outstanding new
+    clients get the default location without queueing another one.
+    """
+    
+    def __init__(self, resolver, deadline_seconds=None, cache_ttl_seconds=None,
+                 cache_max_entries=None, max_workers=None, negative_ttl_seconds=None,
+                 max_pending=None):
+        """
+        Args:
+            resolver: Callable(ip) returning (latitude, longitude) or None
+            deadline_seconds: Overall time budget per lookup (defaults to config)
+            cache_ttl_seconds: Lifetime of cached answers (defaults to config)
+            cache_max_entries: Maximum cached IPs (defaults to config)
+            max_workers: Concurrent background lookups (defaults to config)
+            negative_ttl_seconds: Lifetime of cached failures (defaults to config)
+            max_pending: Maximum outstanding lookups (defaults to config)
+        """
+        self.resolver = resolver
+        self.deadline_seconds = deadline_seconds or GEOLOCATION_SETTINGS["deadline_seconds"]
+        self.cache_ttl_seconds = cache_ttl_seconds or GEOLOCATION_SETTINGS["cache_ttl_seconds"]
+        self.negative_ttl_seconds = (negative_ttl_seconds
+                                     or GEOLOCATION_SETTINGS["negative_ttl_seconds"])
+        self.cache_max_entries = cache_max_entries or GEOLOCATION_SETTINGS["cache_max_entries"]
+        self.max_pending = max_pending or GEOLOCATION_SETTINGS["max_pending"]
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or GEOLOCATION_SETTINGS["max_workers"],
+            thread_name_prefix='geolocation'
+        )
+        self._cache = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+        self.rejected = 0
+    
+    @staticmethod
+    def default_location():
+        return DEFAULT_LOCATION["latitude"], DEFAULT_LOCATION["longitude"]
+    
+    def _cached(self, ip):
+        with self._lock:
+            entry = self._cache.get(ip)
+            if entry is None or entry[0] < time.monotonic():
+                return None
+            self._cache.move_to_end(ip)
+            return entry[1]
+    
+    def _store(self, ip, location, ttl):
+        with self._lock:
+            self._cache[ip] = (time.monotonic() + ttl, location)
+            self._cache.move_to_end(ip)
+            while len(self._cache) > self.cache_max_entries:
+                self._cache.popitem(last=False)
+            self._pending.pop(ip, None)
+    
+    def _resolve(self, ip):
+        try:
+            location = self.resolver(ip)
+        except Exception:
+            logger.warning("IP geolocation failed for %s", ip, exc_info=True)
+            location = None
+        if location is None:
+            location = self.default_location()
+            self._store(ip, location, self.negative_ttl_seconds)
+        else:
+            self._store(ip, location, self.cache_ttl_seconds)
+        return location
+    
+    def locate(self, ip):
+        """
+        Resolve a client IP to (latitude, longitude).
+        
+        Private, loopback and malformed addresses resolve to the default
+        location without a lookup.
+        
+        Args:
+            ip: Client IP address
+            
+        Returns:
+            tuple: (latitude, longitude)
+        """
+        try:
+            address = ipaddress.ip_address(ip)
+        except (TypeError, ValueError):
+            return self.default_location()
+        if not address.is_global:
+            return self.default_location()
+        
+        ip = str(address)
+        location = self._cached(ip)
+        if location is not None:
+            self.hits += 1
+            return location
+        self.misses += 1
+        
+        with self._lock:
+            future = self._pending.get(ip)
+            if future is None:
+                if len(self._pending) >= self.max_pending:
+                    self.rejected += 1
+                    return self.default_location()
+                future = self._executor.submit(self._resolve, ip)
+                self._pending[ip] = future
+        try:
+            return future.result(timeout=self.deadline_seconds)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            return self.default_location()
+    
+    def stats(self):
+        """Return a dict of cache and timeout counters."""
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+        }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_geolocation_service():
+    """
+    Return the process-wide GeolocationService, creating it on first use.
+    
+    The local IP-range database (GEOIP_RANGE_DB environment variable or
+    GEOLOCATION_SETTINGS["ip_database"]) is used as the resolver when
+    configured; otherwise lookups go to the geocoder web service.
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            database = os.environ.get("GEOIP_RANGE_DB") or GEOLOCATION_SETTINGS["ip_database"]
+            resolver = IPRangeResolver(database) if database else geocoder_resolver
+            _service = GeolocationService(resolver)
+        return _service
+
+
+def client_ip(request):
+    """
+    Return the client IP of a Flask request.
+    
+    X-Forwarded-For is only honoured when GEOLOCATION_SETTINGS says the app
+    runs behind a trusted proxy, since clients can set it freely.
+    """
+    if GEOLOCATION_SETTINGS["trust_forwarded_for"]:
+        forwarded = request.headers.get('X-Forwarded-For', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.remote_addr
+
+
+def update_user_location_with_fallback(client_ip=None):
     """
     Get user location with fallback to default.
     
+    Args:
+        client_ip: Optional client IP; when given the client (not the server)
+            is geolocated through the cached, deadline-bound service
+    
     Returns:
         tuple: (latitude, longitude)
     """
@@ -39,6 +286,9 @@ def update_user_location_with_fallback():
     if os.environ.get("FORCE_DEFAULT_LOCATION", "1") == "1":
         return DEFAULT_LOCATION["latitude"], DEFAULT_LOCATION["longitude"]
     
+    if client_ip is not None:
+        return get_geolocation_service().locate(client_ip)
+    
     latitude, longitude = get_user_location()
     
     # If location detection failed, use default
@@ -46,4 +296,3 @@ def update_user_location_with_fallback():
         return DEFAULT_LOCATION["latitude"], DEFAULT_LOCATION["longitude"]
     
     return latitude, longitude
-
@@ -0,0 +1,131 @@
+"""Content-addressed, size/age-bounded cache of rendered map HTML files."""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from app.config import MAP_CACHE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+MAP_FILENAME = re.compile(r'^map-[0-9a-f]{24}\.html$')
+
+
+class MapFileCache:
+    """
+    Store rendered maps under a filename derived from everything that shapes them.
+
+    Identical inputs (dataset version, location cell, map settings) always map
+    to the same file, so a map is rendered at most once and can be served with
+    immutable cache headers. Files unused for longer than ``max_age_seconds``
+    are deleted, and the least recently used files go first when the directory
+    grows beyond ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=None, max_age_seconds=None):
+        """
+        Args:
+            directory: Directory holding the map files
+            max_bytes: Disk budget for all map files (defaults to config)
+            max_age_seconds: Maximum time since last use (defaults to config)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes or MAP_CACHE_SETTINGS["max_bytes"]
+        self.max_age_seconds = max_age_seconds or MAP_CACHE_SETTINGS["max_age_seconds"]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def filename_for(version, cell=None, settings=None):
+        """
+        Derive the content-addressed filename for a map.
+
+        Args:
+            version: Dataset version the map shows
+            cell: Location cell the map is specific to (None for shared maps)
+            settings: Map settings that affect the rendered output
+
+        Returns:
+            str: Filename such as ``map-<24 hex chars>.html``
+        """
+        material = json.dumps(
+            {'version': version, 'cell': cell, 'settings': settings},
+            sort_keys=True, default=str
+        )
+        return f"map-{hashlib.sha256(material.encode()).hexdigest()[:24]}.html"
+
+    @staticmethod
+    def is_valid_filename(filename):
+        """Return True if filename looks like one this cache produced."""
+        return bool(MAP_FILENAME.match(filename))
+
+    def get_or_render(self, filename, render):
+        """
+        Return filename, rendering the map first if it is not on disk.
+
+        Args:
+            filename: Content-addressed filename from filename_for
+            render: Callable taking a path and writing the map HTML to it
+
+        Returns:
+            str: The filename
+        """
+        path = os.path.join(self.directory, filename)
+        with self._lock:
+            if os.path.exists(path):
+                self.hits += 1
+                # mtime doubles as the last-use time for eviction
+                os.utime(path)
+                return filename
+
+            self.misses += 1
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            os.close(fd)
+            try:
+                render(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self._evict(keep=path)
+        return filename
+
+    def _evict(self, keep):
+        """Delete expired files, then least recently used ones beyond the byte budget."""
+        now = time.time()
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.html'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in sorted(files):
+            if path == keep:
+                continue
+            if now - mtime <= self.max_age_seconds and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+            logger.debug("Evicted map file %s", path)
+
+    def stats(self):
+        """Return a dict of cache counters."""
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
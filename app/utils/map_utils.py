@@ -1,12 +1,150 @@
 """Map visualization utilities using Folium."""
 
+import json
+
 import folium
+from branca.element import MacroElement
+from folium.plugins import FastMarkerCluster, MarkerCluster
+from jinja2 import Template
 from app.config import (
     MAP_SETTINGS,
     SAFETY_COLORS,
-    DISTANCE_THRESHOLDS
+    DISTANCE_THRESHOLDS,
+    DEFAULT_LOCATION
 )
 
+USER_ICON_URL = "https://cdn-icons-png.flaticon.com/512/447/447031.png"
+USER_COLOR = '#007bff'
+
+# Compact plant rows sent to the browser: [lat, lon, safety code, name, age]
+PLANT_ROW_FIELDS = ['latitude', 'longitude', 'safety', 'name', 'age']
+SAFETY_LEVELS = list(SAFETY_COLORS)
+
+# Builds a Leaflet layer from a compact plant row; expects SAFETY_STYLES in scope
+PLANT_MARKER_JS = """
+    function plantMarker(row) {
+        var style = SAFETY_STYLES[row[2]] || {color: 'blue', name: 'Unknown'};
+        return L.circleMarker([row[0], row[1]], {
+            radius: 6, color: style.color, fillColor: style.color, fillOpacity: 0.7, weight: 1
+        }).bindTooltip(row[3] + ' - ' + style.name + ' (' + row[4] + ' years)')
+          .bindPopup('<b>' + row[3] + '</b><br>Age: ' + row[4] + ' years<br>Status: ' + style.name);
+    }
+"""
+
+
+def safety_styles_js():
+    """JavaScript array literal of {color, name} indexed by safety code."""
+    return json.dumps([
+        {'color': SAFETY_COLORS[level]['color'], 'name': level} for level in SAFETY_LEVELS
+    ])
+
+
+def compact_plant_rows(df, positions=None):
+    """
+    Encode plants as compact [lat, lon, safety code, name, age] rows.
+    
+    Args:
+        df: DataFrame with plant data
+        positions: Optional row positions to encode (default: all rows)
+        
+    Returns:
+        list: One list per plant
+    """
+    if positions is not None:
+        df = df.iloc[positions]
+    codes = {level: i for i, level in enumerate(SAFETY_LEVELS)}
+    return [
+        [latitude, longitude, codes.get(safety, -1), name, age]
+        for latitude, longitude, safety, name, age in zip(
+            df['Latitude'].tolist(), df['Longitude'].tolist(), df['Safety'].tolist(),
+            df['Name'].tolist(), df['Age'].tolist()
+        )
+    ]
+
+
+class ViewportPlantLayer(MacroElement):
+    """
+    Load only the plants inside the current viewport into a marker cluster.
+    
+    Plants are fetched from a bounding-box endpoint on every pan/zoom, so
+    the map HTML carries no plant data and render time does not grow with
+    the registry.
+    """
+    
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            (function() {
+                var map = {{ this._parent.get_name() }};
+                var cluster = {{ this.cluster.get_name() }};
+                var SAFETY_STYLES = {{ this.styles }};
+                {{ this.marker_js }}
+                var pending = null;
+                function loadPlants() {
+                    if (pending) { pending.abort(); }
+                    pending = new AbortController();
+                    var url = {{ this.plants_url|tojson }} + '?bbox=' +
+                        map.getBounds().toBBoxString() + '&zoom=' + map.getZoom();
+                    fetch(url, {credentials: 'same-origin', signal: pending.signal})
+                        .then(function(response) { return response.ok ? response.json() : null; })
+                        .then(function(result) {
+                            if (!result) { return; }
+                            cluster.clearLayers();
+                            cluster.addLayers(result.rows.map(plantMarker));
+                        })
+                        .catch(function() {});
+                }
+                map.on('moveend', loadPlants);
+                loadPlants();
+            })();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, plants_url, cluster):
+        super().__init__()
+        self._name = 'ViewportPlantLayer'
+        self.plants_url = plants_url
+        self.cluster = cluster
+        self.styles = safety_styles_js()
+        self.marker_js = PLANT_MARKER_JS
+
+
+class OverlayLoader(MacroElement):
+    """
+    Fetch the per-user overlay JSON when the map loads and draw it with Leaflet.
+
+    This keeps the rendered map HTML identical for every user, so it can be
+    built once per dataset version and cached.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            fetch({{ this.overlay_url|tojson }}, {credentials: 'same-origin'})
+                .then(function(response) { return response.ok ? response.json() : null; })
+                .then(function(overlay) {
+                    if (!overlay || !overlay.user) { return; }
+                    var map = {{ this._parent.get_name() }};
+                    var user = overlay.user;
+                    var latlng = [user.latitude, user.longitude];
+                    L.marker(latlng, {
+                        icon: L.icon({iconUrl: user.icon_url, iconSize: user.icon_size})
+                    }).bindTooltip(user.tooltip).bindPopup(user.popup).addTo(map);
+                    L.circle(latlng, {
+                        radius: overlay.radius.meters,
+                        color: overlay.radius.color,
+                        fill: true,
+                        fillColor: overlay.radius.color,
+                        fillOpacity: 0.1
+                    }).bindTooltip(overlay.radius.tooltip).addTo(map);
+                    map.setView(latlng, map.getZoom());
+                });
+        {% endmacro %}
+    """)
+
+    def __init__(self, overlay_url):
+        super().__init__()
+        self._name = 'OverlayLoader'
+        self.overlay_url = overlay_url
+
 
 def create_map(user_latitude, user_longitude):
     """
@@ -119,7 +257,7 @@ def add_user_marker(map_obj, user_latitude, user_longitude, on_site_plants=None)
         folium.Marker(
             location=[user_latitude, user_longitude],
             icon=folium.CustomIcon(
-                icon_image="https://cdn-icons-png.flaticon.com/512/447/447031.png",
+                icon_image=USER_ICON_URL,
                 icon_size=MAP_SETTINGS["user_icon_size"]
             ),
             tooltip="Your Location",
@@ -130,10 +268,107 @@ def add_user_marker(map_obj, user_latitude, user_longitude, on_site_plants=None)
         folium.Circle(
             location=[user_latitude, user_longitude],
             radius=MAP_SETTINGS["user_radius"],
-            color='#007bff',
+            color=USER_COLOR,
             fill=True,
-            fill_color='#007bff',
+            fill_color=USER_COLOR,
             fill_opacity=0.1,
             tooltip=f"{DISTANCE_THRESHOLDS['dangerous_zone']}km radius from your location"
         ).add_to(map_obj)
 
+
+def add_plant_cluster(map_obj, df):
+    """
+    Add all plants as one client-side marker cluster built from compact rows.
+    
+    Args:
+        map_obj: Folium map object
+        df: DataFrame with plant data
+    """
+    # FastMarkerCluster assigns this expression to its `callback` variable
+    callback = (
+        "(function() {"
+        f"var SAFETY_STYLES = {safety_styles_js()};"
+        f"{PLANT_MARKER_JS}"
+        "return plantMarker;"
+        "})()"
+    )
+    FastMarkerCluster(
+        compact_plant_rows(df), callback=callback, name='Nuclear Plants'
+    ).add_to(map_obj)
+
+
+def add_viewport_plants(map_obj, plants_url):
+    """
+    Add a cluster layer that fetches the plants inside the viewport on demand.
+    
+    Args:
+        map_obj: Folium map object
+        plants_url: URL of the bounding-box plant endpoint
+    """
+    cluster = MarkerCluster(name='Nuclear Plants').add_to(map_obj)
+    map_obj.add_child(ViewportPlantLayer(plants_url, cluster))
+
+
+def create_base_map(df, overlay_url, plants_url=None):
+    """
+    Create the shared plant map that the per-user overlay is drawn on.
+    
+    The plant layer follows MAP_SETTINGS["plant_layer"]: 'markers' (one
+    circle and marker per plant), 'cluster' (a client-side cluster of
+    compact rows) or 'viewport' (clustered, fetched per viewport from
+    plants_url).
+    
+    Args:
+        df: DataFrame with plant data
+        overlay_url: URL of the JSON overlay endpoint the map fetches on load
+        plants_url: URL of the bounding-box plant endpoint (viewport mode)
+        
+    Returns:
+        folium.Map: Map with the plant layer and the overlay loader
+    """
+    map_obj = create_map(DEFAULT_LOCATION["latitude"], DEFAULT_LOCATION["longitude"])
+    plant_layer = MAP_SETTINGS["plant_layer"]
+    if plant_layer == 'viewport' and plants_url:
+        add_viewport_plants(map_obj, plants_url)
+    elif plant_layer in ('cluster', 'viewport'):
+        add_plant_cluster(map_obj, df)
+    else:
+        add_plant_markers(map_obj, df)
+    map_obj.add_child(OverlayLoader(overlay_url))
+    return map_obj
+
+
+def build_user_overlay(user_latitude, user_longitude, on_site_plants=None):
+    """
+    Describe the user marker and radius circle as JSON for the overlay loader.
+    
+    Args:
+        user_latitude: User's latitude
+        user_longitude: User's longitude
+        on_site_plants: Optional list of plant names user is on-site at
+        
+    Returns:
+        dict: Overlay description ({} when the location is unknown)
+    """
+    if not (user_latitude and user_longitude):
+        return {}
+    
+    popup_msg = "Your Location"
+    if on_site_plants:
+        popup_msg = f"On site at: {', '.join(on_site_plants)}"
+    
+    return {
+        'user': {
+            'latitude': user_latitude,
+            'longitude': user_longitude,
+            'tooltip': "Your Location",
+            'popup': popup_msg,
+            'icon_url': USER_ICON_URL,
+            'icon_size': list(MAP_SETTINGS["user_icon_size"])
+        },
+        'radius': {
+            'meters': MAP_SETTINGS["user_radius"],
+            'color': USER_COLOR,
+            'tooltip': f"{DISTANCE_THRESHOLDS['dangerous_zone']}km radius from your location"
+        }
+    }
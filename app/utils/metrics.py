@@ -0,0 +1,164 @@
+"""Stage timers, Server-Timing headers and Prometheus text-format metrics."""
+
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+from app.config import METRICS_SETTINGS
+
+# Stats keys that only ever grow; exported as Prometheus counters
+COUNTER_KEYS = {
+    'hits', 'misses', 'evictions', 'timeouts',
+    'enqueued', 'delivered', 'failed', 'dropped', 'delivery_seconds_total',
+    'full_updates', 'partial_updates', 'skipped_updates', 'recomputed_plants',
+    'updates', 'rebases', 'measured_plants', 'enter_events', 'exit_events',
+}
+
+
+class Histogram:
+    """
+    A thread-safe Prometheus histogram with optional labels.
+
+    Bucket counts are cumulative on output, as the exposition format requires.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        """
+        Args:
+            name: Metric name
+            documentation: HELP text
+            labelnames: Names of the labels observations are split by
+            buckets: Upper bounds in seconds (defaults to config)
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets or METRICS_SETTINGS["buckets"]))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        """Record one observation for the given label values."""
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """Return the metric in Prometheus text format, as a list of lines."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+        for labelvalues, (counts, total, count) in series:
+            labels = list(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{_labels(labels + [("le", _number(bound))])} {cumulative}')
+            lines.append(f'{self.name}_bucket{_labels(labels + [("le", "+Inf")])} {count}')
+            lines.append(f'{self.name}_sum{_labels(labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(labels)} {count}')
+        return lines
+
+
+stage_seconds = Histogram(
+    'nuclalert_stage_seconds', 'Time spent in each processing stage.', ('stage',)
+)
+request_seconds = Histogram(
+    'nuclalert_http_request_duration_seconds', 'HTTP request latency.',
+    ('endpoint', 'method', 'status')
+)
+
+
+@contextmanager
+def timed(stage):
+    """
+    Time a block as a named stage.
+
+    The duration always feeds the stage histogram; inside a request it is
+    also added to that request's Server-Timing entries.
+
+    Args:
+        stage: Stage name (a token: letters, digits, '_' or '-')
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, stage)
+        if has_request_context():
+            timings = g.setdefault('stage_timings', {})
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def server_timing_header(timings, total=None):
+    """
+    Format stage durations as a Server-Timing header value.
+
+    Args:
+        timings: Dict of stage name -> seconds
+        total: Optional whole-request duration in seconds
+
+    Returns:
+        str: e.g. ``snapshot;dur=0.04, proximity;dur=1.92, total;dur=2.31``
+    """
+    entries = [f'{stage};dur={seconds * 1000:.2f}' for stage, seconds in timings.items()]
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(entries)
+
+
+def stats_metrics(prefix, documentation, stats):
+    """
+    Render a component's stats() dict as Prometheus gauges and counters.
+
+    Keys in COUNTER_KEYS become ``<prefix>_<key>_total`` counters (without
+    doubling an existing ``_total`` suffix); everything else is a gauge.
+
+    Args:
+        prefix: Metric name prefix, e.g. ``nuclalert_result_cache``
+        documentation: HELP text shared by the component's metrics
+        stats: Dict of numeric stats
+
+    Returns:
+        list: Lines in Prometheus text format
+    """
+    lines = []
+    for key, value in stats.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            continue
+        key = re.sub(r'[^a-zA-Z0-9_]', '_', key)
+        if key in COUNTER_KEYS:
+            name, kind = f"{prefix}_{key.removesuffix('_total')}_total", 'counter'
+        else:
+            name, kind = f'{prefix}_{key}', 'gauge'
+        lines += [f'# HELP {name} {documentation} ({key})', f'# TYPE {name} {kind}',
+                  f'{name} {_number(value)}']
+    return lines
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
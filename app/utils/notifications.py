@@ -1,12 +1,19 @@
 """Desktop notification utilities."""
 
-from plyer import notification
-from app.config import NOTIFICATION_TIMEOUTS
+import logging
+import os
+import threading
+import time
+from collections import deque
 
+from app.config import NOTIFICATION_TIMEOUTS, NOTIFICATION_QUEUE_SETTINGS
 
-def send_notification(level, plants):
+logger = logging.getLogger(__name__)
+
+
+def deliver_notification(level, plants):
     """
-    Send desktop notification based on radiation level.
+    Send desktop notification based on radiation level (blocking).
     
     Args:
         level: Notification level ('dangerous', 'moderate', 'safe')
@@ -15,6 +22,8 @@ def send_notification(level, plants):
     if not plants:
         return
     
+    from plyer import notification  # deferred: never loaded when notifications are off
+    
     timeouts = NOTIFICATION_TIMEOUTS
     
     if level == 'dangerous':
@@ -37,3 +46,133 @@ def send_notification(level, plants):
             timeout=timeouts["safe"]
         )
 
+
+class NotificationDispatcher:
+    """
+    Deliver notifications from a bounded in-process queue on a background thread.
+    
+    Submitting never blocks: when the queue is full the oldest pending
+    notification is dropped, since a newer alert supersedes it. Delivery
+    failures (e.g. no notification backend on a headless server) are
+    counted and logged instead of reaching the request.
+    """
+    
+    def __init__(self, deliver=deliver_notification, max_pending=None):
+        """
+        Args:
+            deliver: Callable(level, plants) that performs the delivery
+            max_pending: Queue bound (defaults to config)
+        """
+        self.deliver = deliver
+        self.max_pending = max_pending or NOTIFICATION_QUEUE_SETTINGS["max_pending"]
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._busy = False
+        self.enqueued = 0
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.delivery_seconds_total = 0.0
+        self.delivery_seconds_max = 0.0
+        self.queue_wait_seconds_max = 0.0
+    
+    def submit(self, level, plants):
+        """
+        Queue a notification for delivery.
+        
+        Args:
+            level: Notification level ('dangerous', 'moderate', 'safe')
+            plants: List of plant names triggering the notification
+            
+        Returns:
+            bool: False if an older pending notification was dropped to make room
+        """
+        with self._cond:
+            dropped = len(self._queue) >= self.max_pending
+            if dropped:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append((time.monotonic(), level, list(plants)))
+            self.enqueued += 1
+            self._ensure_worker()
+            self._cond.notify()
+        return not dropped
+    
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name='notification-worker', daemon=True
+            )
+            self._worker.start()
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._busy = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                queued_at, level, plants = self._queue.popleft()
+                self._busy = True
+            
+            started = time.monotonic()
+            try:
+                self.deliver(level, plants)
+                self.delivered += 1
+            except Exception:
+                self.failed += 1
+                logger.warning("Notification delivery failed", exc_info=True)
+            elapsed = time.monotonic() - started
+            self.delivery_seconds_total += elapsed
+            self.delivery_seconds_max = max(self.delivery_seconds_max, elapsed)
+            self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, started - queued_at)
+    
+    def flush(self, timeout=None):
+        """
+        Wait until every queued notification has been handled.
+        
+        Returns:
+            bool: True if the queue drained within the timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._queue and not self._busy, timeout=timeout
+            )
+    
+    def stats(self):
+        """Return a dict of queue and delivery metrics."""
+        with self._cond:
+            handled = self.delivered + self.failed
+            return {
+                'pending': len(self._queue),
+                'enqueued': self.enqueued,
+                'delivered': self.delivered,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'delivery_seconds_total': self.delivery_seconds_total,
+                'delivery_seconds_avg': self.delivery_seconds_total / handled if handled else 0.0,
+                'delivery_seconds_max': self.delivery_seconds_max,
+                'queue_wait_seconds_max': self.queue_wait_seconds_max,
+            }
+
+
+dispatcher = NotificationDispatcher()
+
+
+def notifications_enabled():
+    """Return False when desktop notifications are switched off with NOTIFICATIONS_ENABLED=0."""
+    return os.environ.get("NOTIFICATIONS_ENABLED", "1") != "0"
+
+
+def send_notification(level, plants):
+    """
+    Queue a desktop notification; delivery happens on a background worker.
+    
+    Args:
+        level: Notification level ('dangerous', 'moderate', 'safe')
+        plants: List of plant names triggering the notification
+    """
+    if not plants or not notifications_enabled():
+        return
+    dispatcher.submit(level, plants)
@@ -0,0 +1,180 @@
+"""Filtering, sorting, pagination and top-k nearest selection over the plant table."""
+
+from dataclasses import dataclass
+
+import numpy as np
+from app.config import PLANT_QUERY_SETTINGS
+from app.utils.data_processor import SAFETY_CATEGORIES
+
+# Columns the table can be sorted by; prefix with '-' for descending
+SORT_KEYS = ('Name', 'Country', 'Status', 'Age', 'Safety', 'Distance')
+
+# Query-string parameters that switch /get_data into query mode
+QUERY_PARAMS = ('limit', 'offset', 'sort', 'safety', 'country', 'status', 'nearest')
+
+
+def _int_arg(args, name, default, maximum):
+    value = args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if value < 0:
+        raise ValueError(f"'{name}' must not be negative")
+    return min(value, maximum) if maximum is not None else value
+
+
+def _list_arg(args, name):
+    """Parse a comma-separated filter into a sorted tuple of lowercase values."""
+    values = ','.join(args.getlist(name))
+    return tuple(sorted({v.strip().lower() for v in values.split(',') if v.strip()}))
+
+
+@dataclass(frozen=True)
+class PlantQuery:
+    """
+    A normalized plant table query.
+
+    Instances are hashable and compare equal for equivalent query strings,
+    so they can be part of a response cache key.
+    """
+
+    limit: int
+    offset: int = 0
+    sort: str = 'Name'
+    safety: tuple = ()
+    country: tuple = ()
+    status: tuple = ()
+    nearest: int = 0
+
+    @classmethod
+    def from_args(cls, args):
+        """
+        Parse request arguments into a query.
+
+        Args:
+            args: Request query arguments (a werkzeug MultiDict)
+
+        Returns:
+            PlantQuery: The normalized query
+
+        Raises:
+            ValueError: If a parameter is malformed
+        """
+        sort = args.get('sort') or 'Name'
+        if sort.lstrip('-') not in SORT_KEYS:
+            raise ValueError(f"'sort' must be one of {', '.join(SORT_KEYS)} (prefix '-' to reverse)")
+        return cls(
+            limit=_int_arg(args, 'limit', PLANT_QUERY_SETTINGS["default_limit"],
+                           PLANT_QUERY_SETTINGS["max_limit"]),
+            offset=_int_arg(args, 'offset', 0, None),
+            sort=sort,
+            safety=_list_arg(args, 'safety'),
+            country=_list_arg(args, 'country'),
+            status=_list_arg(args, 'status'),
+            nearest=_int_arg(args, 'nearest', 0, PLANT_QUERY_SETTINGS["max_nearest"]),
+        )
+
+
+def filter_positions(df, query):
+    """
+    Return the row positions of plants matching the query's filters.
+
+    Each filter matches any of its values, case-insensitively; filters combine with AND.
+    """
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in (('Safety', query.safety), ('Country', query.country),
+                           ('Status', query.status)):
+        if values:
+            mask &= df[column].str.lower().isin(values).to_numpy()
+    return np.flatnonzero(mask)
+
+
+def smallest(keys, count):
+    """
+    Return indices of the ``count`` smallest keys, ordered by (key, index).
+
+    Uses partial selection: only the selected keys (plus any ties at the
+    boundary) are sorted, so the cost is O(n + count log count) rather than
+    a full sort. The result equals the first ``count`` entries of a stable
+    full sort.
+
+    Args:
+        keys: 1-D numeric array
+        count: Number of indices to return
+
+    Returns:
+        numpy.ndarray: Selected indices
+    """
+    keys = np.asarray(keys)
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+    if count < len(keys):
+        kth = np.partition(keys, count - 1)[count - 1]
+        # Not `keys <= kth`: NaN keys (unknown distances) must not be lost when kth is NaN
+        chosen = np.flatnonzero(~(keys > kth))
+    else:
+        chosen = np.arange(len(keys))
+    order = np.lexsort((chosen, keys[chosen]))
+    return chosen[order][:count]
+
+
+def sort_keys(df, distances, sort, positions):
+    """Return numeric sort keys for the given rows (ascending order sorts as requested)."""
+    column = sort.lstrip('-')
+    if column == 'Distance':
+        keys = distances[positions]
+    elif column == 'Age':
+        keys = df['Age'].to_numpy(dtype=np.float64)[positions]
+    elif column == 'Safety':
+        # Severity order; Unknown has none and sorts last either way, like a NaN distance
+        values = df['Safety'].to_numpy()[positions].astype(str)
+        keys = np.full(len(values), np.nan)
+        for rank, level in enumerate(SAFETY_CATEGORIES[:3]):
+            keys[values == level] = rank
+    else:
+        # Dense ranks make text columns numeric (and safely negatable)
+        values = df[column].to_numpy()[positions].astype(str)
+        keys = np.unique(np.char.lower(values), return_inverse=True)[1].astype(np.float64)
+    return -keys if sort.startswith('-') else keys
+
+
+def run_query(df, distances, query):
+    """
+    Apply a query to the plant table.
+
+    Args:
+        df: Processed plant DataFrame
+        distances: Distances in km from the user, aligned with df rows
+        query: PlantQuery to apply
+
+    Returns:
+        tuple: (page row positions, number of matching rows, nearest row positions)
+    """
+    positions = filter_positions(df, query)
+    stop = query.offset + query.limit
+    page = positions[smallest(sort_keys(df, distances, query.sort, positions), stop)][query.offset:]
+    nearest = positions[smallest(distances[positions], query.nearest)]
+    return page, len(positions), nearest
+
+
+def plant_rows(records, distances, positions):
+    """
+    Build response rows for the given positions: the plant record plus its Distance.
+
+    Args:
+        records: Plant records (one dict per table row)
+        distances: Distances in km aligned with records
+        positions: Row positions to include, in output order
+
+    Returns:
+        list: One dict per position
+    """
+    rows = []
+    for position, distance in zip(positions.tolist(), distances[positions].tolist()):
+        row = dict(records[position])
+        row['Distance'] = distance if np.isfinite(distance) else None
+        rows.append(row)
+    return rows
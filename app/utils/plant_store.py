@@ -0,0 +1,502 @@
+"""Plant dataset loading and the shared, hot-reloadable plant snapshot."""
+
+import logging
+import os
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+from app.config import (
+    PLANT_DATA_SETTINGS, PLANT_UPDATE_SETTINGS, RISK_RASTER_SETTINGS, TABLE_CACHE_SETTINGS
+)
+from app.utils.data_processor import (
+    classify_safety, derive_ages, operational_years, process_plant_data
+)
+from app.utils.metrics import timed
+from app.utils.risk_raster import GLOBAL_BBOX, RiskRaster
+from app.utils.spatial_index import PlantGridIndex
+from app.utils.table_cache import TableCache, file_digest
+
+logger = logging.getLogger(__name__)
+
+
+def count_safety(safety):
+    """Count plants per safety level."""
+    return {level: int((safety == level).sum()) for level in ('Safe', 'Moderate', 'Dangerous')}
+
+
+def plant_ids(df):
+    """
+    Derive stable plant IDs: the IAEA reactor ID where known, otherwise the name.
+
+    Args:
+        df: Raw plant DataFrame (Name and optionally IAEAId columns)
+
+    Returns:
+        Series: String IDs aligned with df
+    """
+    names = df['Name'].astype(str)
+    if 'IAEAId' not in df.columns:
+        return names
+    iaea = pd.to_numeric(df['IAEAId'], errors='coerce')
+    return iaea.astype('Int64').astype(str).where(iaea.notna(), names)
+
+
+def load_plant_table(data_path):
+    """
+    Load a plant CSV and process it into the table the app queries.
+
+    Args:
+        data_path: Path to the plant CSV file
+
+    Returns:
+        DataFrame: Processed plant data (PlantId, Name, Latitude, Longitude,
+            Age, Country, Status, Safety)
+    """
+    with timed('csv_read'):
+        df = pd.read_csv(data_path)
+
+    # Handle the first empty column if it exists
+    if df.columns[0].strip() == '' or df.columns[0] == 'Unnamed: 0':
+        df = df.drop(df.columns[0], axis=1)
+
+    # Ensure we have the required columns (Name, Latitude, Longitude, Age)
+    # If Age column doesn't exist or has issues, calculate it from OperationalFrom
+    if 'Age' not in df.columns:
+        df['Age'] = 0
+
+    # Fill NaN values in Age column
+    if df['Age'].isna().any():
+        # Derive age from OperationalFrom if available
+        if 'OperationalFrom' in df.columns:
+            ages = pd.to_numeric(df['Age'], errors='coerce')
+            df['Age'] = ages.where(ages > 0, derive_ages(df['OperationalFrom']))
+        else:
+            df['Age'] = df['Age'].fillna(0)
+
+    # Ensure Age is numeric
+    df['Age'] = pd.to_numeric(df['Age'], errors='coerce').fillna(0)
+
+    # Filter to only required columns
+    required_cols = ['Name', 'Latitude', 'Longitude', 'Age']
+    # Check if all required columns exist
+    missing_cols = [col for col in required_cols if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+
+    # Descriptive columns kept for filtering; blank when the source lacks them
+    for col in ('Country', 'Status'):
+        if col not in df.columns:
+            df[col] = ''
+    df[['Country', 'Status']] = df[['Country', 'Status']].fillna('').astype(str)
+
+    df['PlantId'] = plant_ids(df)
+    df = df[['PlantId'] + required_cols + ['Country', 'Status']].copy()
+
+    # Add a reference plant near Prayagraj / Allahabad for demo alerts
+    prayagraj_plant = {
+        'PlantId': 'Prayagraj Research Reactor',
+        'Name': 'Prayagraj Research Reactor',
+        'Latitude': 25.4358,
+        'Longitude': 81.8463,
+        'Age': 22,  # Moderate by default thresholds
+        'Country': 'India',
+        'Status': 'Operational'
+    }
+    df = pd.concat([df, pd.DataFrame([prayagraj_plant])], ignore_index=True)
+
+    # Remove rows with missing essential data
+    df = df.dropna(subset=['Name', 'Latitude', 'Longitude'])
+    df = df.drop_duplicates(subset='PlantId')
+
+    with timed('process_plant_data'):
+        return process_plant_data(df).reset_index(drop=True)
+
+
+# Table columns a plant upsert may set (Safety is always derived from Age)
+PLANT_FIELDS = ('Name', 'Latitude', 'Longitude', 'Age', 'Country', 'Status')
+
+
+def normalize_plant(plant_id, fields, current=None):
+    """
+    Validate an upsert and turn it into a full table row.
+
+    Fields missing from an update of an existing plant keep their current
+    values. A new plant needs Latitude and Longitude; its Name defaults to
+    the ID. Age may be given directly or derived from OperationalFrom.
+
+    Args:
+        plant_id: Stable plant ID
+        fields: Dict of column values from the request
+        current: The plant's current record, or None for a new plant
+
+    Returns:
+        dict: Row values for PlantId and PLANT_FIELDS
+
+    Raises:
+        ValueError: If a field is unknown or invalid
+    """
+    unknown = set(fields) - set(PLANT_FIELDS) - {'PlantId', 'OperationalFrom'}
+    if unknown:
+        raise ValueError(f"Unknown plant fields: {sorted(unknown)}")
+
+    row = {col: current[col] for col in PLANT_FIELDS} if current else {
+        'Name': plant_id, 'Age': 0, 'Country': '', 'Status': ''
+    }
+    row.update({col: fields[col] for col in PLANT_FIELDS if col in fields})
+    if 'Name' in fields and (not isinstance(fields['Name'], str) or not fields['Name'].strip()):
+        raise ValueError("'Name' must be a non-empty string")
+    operational_from = fields.get('OperationalFrom')
+    if 'Age' not in fields and operational_from not in (None, ''):
+        if (not isinstance(operational_from, str)
+                or np.isnan(operational_years([operational_from])[0])):
+            raise ValueError("'OperationalFrom' must be a date such as 31-12-1990 or a year")
+        row['Age'] = derive_ages([operational_from]).iloc[0]
+
+    for col in ('Latitude', 'Longitude'):
+        if row.get(col) is None:
+            raise ValueError(f"'{col}' is required for a new plant")
+    if any(isinstance(row[col], bool) for col in ('Latitude', 'Longitude', 'Age')):
+        raise ValueError("'Latitude', 'Longitude' and 'Age' must be numbers")
+    try:
+        latitude, longitude = float(row['Latitude']), float(row['Longitude'])
+        age = float(row['Age'])
+    except (TypeError, ValueError):
+        raise ValueError("'Latitude', 'Longitude' and 'Age' must be numbers")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Coordinates are out of range")
+    if not 0 <= age <= PLANT_UPDATE_SETTINGS["max_age"]:  # also rejects NaN and inf
+        raise ValueError(f"'Age' must be between 0 and {PLANT_UPDATE_SETTINGS['max_age']}")
+
+    return {
+        'PlantId': str(plant_id),
+        'Name': str(row['Name']),
+        'Latitude': latitude,
+        'Longitude': longitude,
+        'Age': round(age),
+        'Country': str(row['Country'] or ''),
+        'Status': str(row['Status'] or ''),
+    }
+
+
+@dataclass(frozen=True)
+class PlantChange:
+    """
+    How one snapshot was derived from the previous one by upserts and deletes.
+
+    ``source[i]`` is the row of the previous snapshot that row ``i`` was
+    carried over from unchanged, or -1 for rows that were inserted or
+    updated (listed in ``changed``).
+    """
+
+    previous_version: str
+    version: str
+    source: np.ndarray
+    changed: np.ndarray
+
+
+@dataclass(frozen=True)
+class PlantSnapshot:
+    """
+    An immutable, fully processed view of the plant dataset.
+
+    Requests hold a reference to one snapshot for their whole lifetime, so a
+    concurrent reload never changes the data underneath them.
+    """
+
+    version: str
+    df: pd.DataFrame
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    names: np.ndarray
+    safety: np.ndarray
+    index: PlantGridIndex
+    records: list
+    safety_counts: dict
+    ids: np.ndarray
+    positions: dict
+
+    @classmethod
+    def from_dataframe(cls, df, version):
+        """
+        Build a snapshot and all derived structures from a processed plant table.
+
+        Args:
+            df: Processed plant DataFrame
+            version: Dataset version identifier
+
+        Returns:
+            PlantSnapshot: The snapshot
+        """
+        latitudes = df['Latitude'].to_numpy(dtype=np.float64)
+        longitudes = df['Longitude'].to_numpy(dtype=np.float64)
+        names = df['Name'].to_numpy()
+        safety = df['Safety'].to_numpy()
+        ids = df['PlantId'].to_numpy()
+        for array in (latitudes, longitudes, names, safety, ids):
+            array.flags.writeable = False
+
+        return cls(
+            version=version,
+            df=df,
+            latitudes=latitudes,
+            longitudes=longitudes,
+            names=names,
+            safety=safety,
+            index=PlantGridIndex(latitudes, longitudes),
+            records=df.to_dict('records'),
+            safety_counts=count_safety(safety),
+            ids=ids,
+            positions={plant_id: i for i, plant_id in enumerate(ids.tolist())},
+        )
+
+    def __len__(self):
+        return len(self.df)
+
+    @cached_property
+    def raster(self):
+        """Global RiskRaster over the snapshot, built on first use."""
+        with timed('raster_build'):
+            return RiskRaster.build(self.latitudes, self.longitudes, self.safety,
+                                    resolution_deg=RISK_RASTER_SETTINGS["app_resolution_deg"],
+                                    bbox=GLOBAL_BBOX, version=self.version)
+
+    def with_changes(self, upserts=None, deletes=(), version=None):
+        """
+        Derive a new snapshot by upserting and deleting plants by ID.
+
+        Only the affected rows are processed: a delete moves the last row
+        into the freed slot, an insert appends, and the spatial index,
+        records, safety and (once built) the risk raster are updated for
+        those rows alone. Deletes are applied before upserts.
+
+        Args:
+            upserts: Dict of plant ID -> fields (see normalize_plant)
+            deletes: Plant IDs to delete
+            version: Version identifier of the new snapshot
+
+        Returns:
+            tuple: (PlantSnapshot, PlantChange)
+
+        Raises:
+            KeyError: If a deleted plant ID does not exist
+            ValueError: If an upsert is invalid
+        """
+        upserts = upserts or {}
+        n = len(self)
+        source = np.full(n + len(upserts), -1, dtype=np.int64)
+        source[:n] = np.arange(n)
+        ids = np.empty(n + len(upserts), dtype=object)
+        ids[:n] = self.ids
+        positions = dict(self.positions)
+        touched = set()
+
+        for plant_id in deletes:
+            position = positions.pop(plant_id)
+            last = n - 1
+            if position != last:
+                source[position], ids[position] = source[last], ids[last]
+                positions[ids[position]] = position
+            touched.update((position, last))
+            n -= 1
+
+        rows = {}
+        for plant_id, fields in upserts.items():
+            position = positions.get(plant_id)
+            current = self.records[source[position]] if position is not None else None
+            if position is None:
+                position = n
+                n += 1
+                positions[plant_id] = position
+                ids[position] = plant_id
+            rows[position] = normalize_plant(plant_id, fields, current)
+            source[position] = -1
+            touched.add(position)
+
+        source, ids = source[:n], ids[:n]
+        changed = np.array(sorted(rows), dtype=np.int64)
+        patch = pd.DataFrame([rows[position] for position in changed.tolist()],
+                             columns=['PlantId', *PLANT_FIELDS])
+        patch['Safety'] = classify_safety(patch['Age']).astype(object)
+
+        # Carry unchanged rows over by position, then write the changed ones
+        take = np.where(source >= 0, source, 0)
+        columns = {}
+        for col in self.df.columns:
+            series = self.df[col]
+            values = series.to_numpy()[take]
+            if len(changed):
+                values[changed] = patch[col].to_numpy().astype(values.dtype)
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                columns[col] = pd.Categorical(values, categories=series.cat.categories,
+                                              ordered=series.cat.ordered)
+            else:
+                columns[col] = pd.array(values, dtype=series.dtype)
+        df = pd.DataFrame(columns)
+
+        records = [self.records[i] if i >= 0 else None for i in source.tolist()]
+        for position, record in zip(changed.tolist(), df.iloc[changed].to_dict('records')):
+            records[position] = record
+
+        latitudes = df['Latitude'].to_numpy(dtype=np.float64)
+        longitudes = df['Longitude'].to_numpy(dtype=np.float64)
+        names = df['Name'].to_numpy()
+        safety = df['Safety'].to_numpy()
+        for array in (latitudes, longitudes, names, safety, ids):
+            array.flags.writeable = False
+
+        snapshot = type(self)(
+            version=version,
+            df=df,
+            latitudes=latitudes,
+            longitudes=longitudes,
+            names=names,
+            safety=safety,
+            index=self.index.updated(latitudes, longitudes, sorted(touched)),
+            records=records,
+            safety_counts=count_safety(safety),
+            ids=ids,
+            positions=positions,
+        )
+        if 'raster' in self.__dict__:
+            # Carry a built raster over cell by cell instead of rebuilding it on next use
+            snapshot.__dict__['raster'] = self.raster.updated(
+                latitudes, longitudes, safety, sorted(touched), version
+            )
+        return snapshot, PlantChange(self.version, version, source, changed)
+
+
+class PlantStore:
+    """
+    Holds the current PlantSnapshot and swaps it when the source file changes.
+
+    The file is stat'ed at most once per ``reload_check_interval`` seconds;
+    only when its mtime or size moved is it hashed, and only when the hash
+    differs is the table rebuilt. The swap is a single reference assignment,
+    so readers always see either the old or the new snapshot.
+
+    Plants can also be changed in memory with apply_changes; each change
+    set gets a new version. Edits last until the source file itself changes.
+    """
+
+    def __init__(self, data_path, reload_check_interval=None, table_cache=None):
+        """
+        Load the initial snapshot.
+
+        Args:
+            data_path: Path to the plant CSV file
+            reload_check_interval: Minimum seconds between file checks (defaults to config)
+            table_cache: Optional TableCache (a default one is used when enabled in config)
+        """
+        self.data_path = data_path
+        if reload_check_interval is None:
+            reload_check_interval = PLANT_DATA_SETTINGS["reload_check_interval"]
+        self.reload_check_interval = reload_check_interval
+        if table_cache is None and TABLE_CACHE_SETTINGS["enabled"]:
+            try:
+                table_cache = TableCache()
+            except OSError:
+                logger.warning("Plant table cache directory unavailable; caching disabled")
+        self.table_cache = table_cache
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._stat = None
+        self._digest = None
+        # Edited versions are <digest>.<store token>.<revision>: the token is
+        # random per store and the revision never resets, so a version is
+        # never reused for different contents, even across restarts or workers
+        self._token = secrets.token_hex(4)
+        self._revision = 0
+        self._snapshot = None
+        self.reload()
+
+    def _file_stat(self):
+        stat = os.stat(self.data_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _source_digest(self):
+        if self.table_cache is not None:
+            return self.table_cache.source_digest(self.data_path)
+        return file_digest(self.data_path)
+
+    def _load_table(self, digest):
+        """Load the processed table from the columnar cache, building it on a miss."""
+        if self.table_cache is None:
+            return load_plant_table(self.data_path)
+
+        with timed('table_cache_load'):
+            df = self.table_cache.load(digest)
+        if df is None:
+            df = load_plant_table(self.data_path)
+            self.table_cache.store(digest, df)
+        return df
+
+    def reload(self):
+        """
+        Rebuild the snapshot from the source file if its content changed.
+
+        Returns:
+            PlantSnapshot: The current snapshot
+        """
+        with self._lock:
+            stat = self._file_stat()
+            if stat == self._stat and self._snapshot is not None:
+                return self._snapshot
+
+            digest = self._source_digest()
+            if digest != self._digest:
+                df = self._load_table(digest)
+                with timed('snapshot_build'):
+                    self._snapshot = PlantSnapshot.from_dataframe(df, digest[:16])
+                self._digest = digest
+                logger.info("Loaded plant snapshot %s (%d plants)", digest[:16], len(df))
+            self._stat = stat
+            return self._snapshot
+
+    def apply_changes(self, upserts=None, deletes=()):
+        """
+        Upsert and delete plants by ID without reloading the source file.
+
+        Args:
+            upserts: Dict of plant ID -> fields (see normalize_plant)
+            deletes: Plant IDs to delete
+
+        Returns:
+            tuple: (new PlantSnapshot, PlantChange)
+
+        Raises:
+            KeyError: If a deleted plant ID does not exist
+            ValueError: If an upsert is invalid
+        """
+        with self._lock:
+            version = f"{self._digest[:16]}.{self._token}.{self._revision + 1}"
+            snapshot, change = self._snapshot.with_changes(upserts, deletes, version)
+            self._revision += 1
+            self._snapshot = snapshot
+            logger.info("Applied %d upserts and %d deletes as plant snapshot %s",
+                        len(upserts or {}), len(deletes), version)
+            return snapshot, change
+
+    def snapshot(self):
+        """
+        Return the current snapshot, reloading first if the source file changed.
+
+        A failed reload (e.g. a half-written CSV) keeps serving the previous
+        snapshot.
+
+        Returns:
+            PlantSnapshot: The current snapshot
+        """
+        now = time.monotonic()
+        if now - self._last_check >= self.reload_check_interval:
+            self._last_check = now
+            try:
+                return self.reload()
+            except Exception:
+                logger.exception("Plant data reload failed; keeping snapshot %s",
+                                 self._snapshot.version)
+        return self._snapshot
@@ -0,0 +1,112 @@
+"""Opt-in cProfile capture of individual requests."""
+
+import cProfile
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+from urllib.parse import parse_qs
+
+from werkzeug.wsgi import ClosingIterator
+from app.config import PROFILING_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfiler:
+    """
+    WSGI middleware that profiles requests carrying the profiling token.
+
+    A request is profiled when its ``X-Profile`` header or ``profile`` query
+    parameter equals the token. The profile covers the whole request,
+    including streaming the response body, and is written as a pstats file
+    (open with ``python -m pstats``, snakeviz or similar). The response
+    names the file in an ``X-Profile-File`` header.
+
+    Profiling is rate limited per process: at most one profiled request at
+    a time, at least ``min_interval`` seconds apart and ``max_profiles`` in
+    total. Other requests pass through untouched.
+    """
+
+    def __init__(self, app, token, directory, settings=None):
+        """
+        Args:
+            app: WSGI application to wrap
+            token: Secret a request must present to be profiled
+            directory: Directory profile files are written to
+            settings: Limits (defaults to PROFILING_SETTINGS)
+        """
+        settings = settings or PROFILING_SETTINGS
+        self.app = app
+        self.token = token
+        self.directory = directory
+        self.header = 'HTTP_' + settings["header"].upper().replace('-', '_')
+        self.query_param = settings["query_param"]
+        self.max_profiles = settings["max_profiles"]
+        self.min_interval = settings["min_interval"]
+        self.profiles = 0
+        self._last_started = None
+        self._active = False
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if not self._requested(environ) or not self._acquire():
+            return self.app(environ, start_response)
+
+        filename = self._filename(environ)
+
+        def profiled_start_response(status, headers, exc_info=None):
+            headers.append(('X-Profile-File', filename))
+            return start_response(status, headers, exc_info)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            app_iter = self.app(environ, profiled_start_response)
+        except BaseException:
+            self._finish(profiler, filename, started)
+            raise
+        return ClosingIterator(app_iter, lambda: self._finish(profiler, filename, started))
+
+    def _requested(self, environ):
+        """Return True if the request presents the profiling token."""
+        value = environ.get(self.header)
+        if value is None and self.query_param in environ.get('QUERY_STRING', ''):
+            value = parse_qs(environ['QUERY_STRING']).get(self.query_param, [None])[0]
+        return value is not None and hmac.compare_digest(value.encode(), self.token.encode())
+
+    def _acquire(self):
+        """Claim the profiler for one request, if the limits allow it."""
+        with self._lock:
+            now = time.monotonic()
+            if (self._active or self.profiles >= self.max_profiles
+                    or (self._last_started is not None
+                        and now - self._last_started < self.min_interval)):
+                return False
+            self._active = True
+            self._last_started = now
+            self.profiles += 1
+            return True
+
+    def _filename(self, environ):
+        path = re.sub(r'[^A-Za-z0-9]+', '.', environ.get('PATH_INFO', '')).strip('.') or 'root'
+        return (f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.profiles}-"
+                f"{environ.get('REQUEST_METHOD', 'GET')}.{path[:60]}.prof")
+
+    def _finish(self, profiler, filename, started):
+        """Stop profiling, write the profile and release the profiler."""
+        profiler.disable()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, filename)
+            profiler.dump_stats(path)
+            logger.info("Wrote request profile %s (%.1f ms, %d of %d)", path,
+                        (time.perf_counter() - started) * 1000, self.profiles, self.max_profiles)
+        except OSError:
+            logger.warning("Could not write request profile %s", filename, exc_info=True)
+        finally:
+            with self._lock:
+                self._active = False
@@ -0,0 +1,307 @@
+"""Single-pass proximity stage: distances, zones and on-site detection."""
+
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+from app.config import DISTANCE_THRESHOLDS, ON_SITE_DISTANCE_KM, BATCH_SETTINGS
+from app.utils.data_processor import distance_records, plant_distances_km
+from app.utils.distance import distances_km
+
+# Rough per-plant footprint of a distance table record (dict + boxed values)
+RECORD_BYTES_ESTIMATE = 400
+
+# Safety level -> DISTANCE_THRESHOLDS key, most severe first
+ZONE_KEYS = {
+    'Dangerous': 'dangerous_zone',
+    'Moderate': 'moderate_zone',
+    'Safe': 'safe_zone',
+}
+
+
+@dataclass
+class ProximityResult:
+    """
+    Everything a route needs to know about a user's proximity to plants.
+
+    Zone and on-site lists are always filled in. The full distance table
+    (``distances`` and ``plant_distances``) is built from ``df`` on first
+    use when it was not computed up front, so routes that only need zones
+    never measure every plant.
+    """
+
+    user_latitude: float
+    user_longitude: float
+    safe_zones: list = field(default_factory=list)
+    moderate_zones: list = field(default_factory=list)
+    dangerous_zones: list = field(default_factory=list)
+    on_site_plants: list = field(default_factory=list)
+    df: pd.DataFrame = field(default=None, repr=False)
+    _distances: np.ndarray = field(default=None, repr=False)
+    _plant_distances: list = field(default=None, repr=False)
+
+    @property
+    def distances(self):
+        """Distances in km to every plant, aligned with df rows (empty without a location)."""
+        if self._distances is None:
+            if self.df is None or not (self.user_latitude and self.user_longitude):
+                self._distances = np.empty(0)
+            else:
+                self._distances = plant_distances_km(self.df, self.user_latitude,
+                                                     self.user_longitude)
+        return self._distances
+
+    @property
+    def plant_distances(self):
+        """The per-plant distance table (see distance_records)."""
+        if self._plant_distances is None:
+            distances = self.distances
+            self._plant_distances = distance_records(self.df, distances) if len(distances) else []
+        return self._plant_distances
+
+    @property
+    def estimated_size(self):
+        """Approximate footprint in bytes with the distance table built, for cache budgeting."""
+        if self._distances is not None:
+            rows = len(self._distances)
+        else:
+            rows = len(self.df) if self.df is not None else 0
+        return rows * (8 + RECORD_BYTES_ESTIMATE)
+
+    @property
+    def alert_level(self):
+        """Most severe zone level the user is in ('dangerous', 'moderate', 'safe') or None."""
+        if self.dangerous_zones:
+            return 'dangerous'
+        if self.moderate_zones:
+            return 'moderate'
+        if self.safe_zones:
+            return 'safe'
+        return None
+
+    @property
+    def alert_plants(self):
+        """Plants behind the current alert level."""
+        level = self.alert_level
+        return getattr(self, f'{level}_zones') if level else []
+
+
+def zone_masks(safety, distances):
+    """
+    Compute per-level zone membership masks from a distance array.
+
+    Args:
+        safety: Array of safety classifications aligned with distances
+        distances: Distances in km (any shape broadcastable with safety)
+
+    Returns:
+        dict: Safety level -> boolean mask of plants inside that level's zone
+    """
+    return {
+        level: (safety == level) & (distances <= DISTANCE_THRESHOLDS[key])
+        for level, key in ZONE_KEYS.items()
+    }
+
+
+def compute_proximity(df, user_latitude, user_longitude, index=None):
+    """
+    Compute zones and on-site plants, and the distance table when no index is given.
+
+    With a spatial index, zones and the on-site list come from one radius
+    query, so only plants near the user are measured; the full distance
+    table is left to first use. Without one, every distance is computed
+    once and all three are derived from it.
+
+    Args:
+        df: Processed plant DataFrame (with Safety column)
+        user_latitude: User's latitude
+        user_longitude: User's longitude
+        index: Optional PlantGridIndex built over df
+
+    Returns:
+        ProximityResult: Combined proximity result
+    """
+    if not (user_latitude and user_longitude):
+        return ProximityResult(user_latitude, user_longitude)
+
+    if index is None:
+        distances = plant_distances_km(df, user_latitude, user_longitude)
+        positions, nearby = np.arange(len(distances)), distances
+        table = {'_distances': distances, '_plant_distances': distance_records(df, distances)}
+    else:
+        # Only plants within the widest radius can be in a zone or on site
+        reach = max(max(DISTANCE_THRESHOLDS.values(), default=0), ON_SITE_DISTANCE_KM)
+        positions, nearby = index.query_radius(user_latitude, user_longitude, reach)
+        table = {}
+
+    names = df['Name'].to_numpy()[positions]
+    masks = zone_masks(df['Safety'].to_numpy()[positions], nearby)
+
+    return ProximityResult(
+        user_latitude=user_latitude,
+        user_longitude=user_longitude,
+        safe_zones=names[masks['Safe']].tolist(),
+        moderate_zones=names[masks['Moderate']].tolist(),
+        dangerous_zones=names[masks['Dangerous']].tolist(),
+        on_site_plants=names[nearby <= ON_SITE_DISTANCE_KM].tolist(),
+        df=df,
+        **table,
+    )
+
+
+def patch_proximity(proximity, df, change, index=None):
+    """
+    Carry a proximity result over to a snapshot derived by a PlantChange.
+
+    Distances are recomputed only for changed rows; unchanged rows are
+    carried over by position. Zone and on-site lists are then rebuilt from
+    the patched distances, so the result equals a fresh compute_proximity.
+    A result whose distance table was never built is simply recomputed
+    through the index, which touches only nearby plants anyway.
+
+    Args:
+        proximity: ProximityResult computed against the previous snapshot
+        df: Processed plant DataFrame of the new snapshot
+        change: PlantChange from the previous to the new snapshot
+        index: PlantGridIndex of the new snapshot
+
+    Returns:
+        ProximityResult: The patched result
+    """
+    if proximity._distances is None:
+        return compute_proximity(df, proximity.user_latitude, proximity.user_longitude, index)
+    if not len(proximity.distances):
+        return proximity
+
+    source, changed = change.source, change.changed
+    kept = source >= 0
+    distances = np.empty(len(source))
+    distances[kept] = proximity.distances[source[kept]]
+    distances[changed] = distances_km(
+        proximity.user_latitude, proximity.user_longitude,
+        df['Latitude'].to_numpy()[changed], df['Longitude'].to_numpy()[changed]
+    )
+
+    plant_distances = [proximity.plant_distances[i] if i >= 0 else None for i in source.tolist()]
+    for position, record in zip(changed.tolist(),
+                                distance_records(df.iloc[changed], distances[changed])):
+        plant_distances[position] = record
+
+    names = df['Name'].to_numpy()
+    masks = zone_masks(df['Safety'].to_numpy(), distances)
+    return replace(
+        proximity,
+        df=df,
+        _distances=distances,
+        _plant_distances=plant_distances,
+        safe_zones=names[masks['Safe']].tolist(),
+        moderate_zones=names[masks['Moderate']].tolist(),
+        dangerous_zones=names[masks['Dangerous']].tolist(),
+        on_site_plants=names[distances <= ON_SITE_DISTANCE_KM].tolist(),
+    )
+
+
+@dataclass
+class BatchProximityResult:
+    """
+    Proximity of many points to the plant table, in array form.
+
+    Zone and on-site memberships are stored as parallel (point, plant)
+    index arrays, since each point is typically near only a few plants.
+    """
+
+    nearest_indices: np.ndarray
+    nearest_distances: np.ndarray
+    zone_hits: dict
+    on_site_hits: tuple
+
+    def plants_for(self, hits, point):
+        """Return the plant indices of a (point, plant) hit pair belonging to one point."""
+        points, plants = hits
+        lo, hi = np.searchsorted(points, [point, point + 1])
+        return plants[lo:hi]
+
+
+def batch_proximity(latitudes, longitudes, plant_latitudes, plant_longitudes,
+                    plant_safety, nearest=1, chunk_bytes=None, raster=None):
+    """
+    Score many points against the plant table in vectorized chunks.
+
+    Each chunk computes a (points x plants) distance matrix sized to stay
+    within ``chunk_bytes``, then derives the k nearest plants (partial
+    selection, not a full sort), zone membership and on-site hits from it.
+    With a risk raster over the same plants, zone and on-site hits come from
+    its cell lookups instead, and the matrix is only computed when nearest
+    plants are requested.
+
+    Args:
+        latitudes: Point latitudes in degrees
+        longitudes: Point longitudes in degrees
+        plant_latitudes: Plant latitudes in degrees
+        plant_longitudes: Plant longitudes in degrees
+        plant_safety: Plant safety classifications
+        nearest: Number of nearest plants to report per point
+        chunk_bytes: Memory budget per distance matrix chunk (defaults to config)
+        raster: Optional RiskRaster built over the same plant rows
+
+    Returns:
+        BatchProximityResult: Arrays aligned with the input points
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    plant_safety = np.asarray(plant_safety)
+    n_points, n_plants = len(latitudes), len(plant_latitudes)
+    k = max(0, min(nearest, n_plants))
+    chunk_bytes = chunk_bytes or BATCH_SETTINGS["chunk_bytes"]
+    # Several temporaries of the matrix size are alive at once
+    chunk_rows = max(1, chunk_bytes // (max(n_plants, 1) * 8 * 6))
+
+    nearest_indices = np.empty((n_points, k), dtype=np.int64)
+    nearest_distances = np.empty((n_points, k), dtype=np.float64)
+    zone_parts = {level: ([], []) for level in ZONE_KEYS}
+    on_site_parts = ([], [])
+
+    # A raster answers zones and on-site hits, leaving the matrix only for nearest plants
+    matrix_points = n_points if raster is None or k else 0
+    for start in range(0, matrix_points, chunk_rows):
+        stop = min(start + chunk_rows, n_points)
+        distances = distances_km(
+            latitudes[start:stop, None], longitudes[start:stop, None],
+            plant_latitudes, plant_longitudes
+        )
+
+        if k:
+            part = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            part_distances = np.take_along_axis(distances, part, axis=1)
+            order = np.argsort(part_distances, axis=1)
+            nearest_indices[start:stop] = np.take_along_axis(part, order, axis=1)
+            nearest_distances[start:stop] = np.take_along_axis(part_distances, order, axis=1)
+
+        if raster is not None:
+            continue
+        for level, mask in zone_masks(plant_safety, distances).items():
+            points, plants = np.nonzero(mask)
+            zone_parts[level][0].append(points + start)
+            zone_parts[level][1].append(plants)
+        points, plants = np.nonzero(distances <= ON_SITE_DISTANCE_KM)
+        on_site_parts[0].append(points + start)
+        on_site_parts[1].append(plants)
+
+    def join(parts):
+        if not parts[0]:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(parts[0]), np.concatenate(parts[1])
+
+    if raster is not None:
+        classified = raster.classify(latitudes, longitudes)
+        zone_hits, on_site_hits = classified['zone_hits'], classified['on_site_hits']
+    else:
+        zone_hits = {level: join(parts) for level, parts in zone_parts.items()}
+        on_site_hits = join(on_site_parts)
+
+    return BatchProximityResult(
+        nearest_indices=nearest_indices,
+        nearest_distances=nearest_distances,
+        zone_hits=zone_hits,
+        on_site_hits=on_site_hits,
+    )
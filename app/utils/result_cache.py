@@ -0,0 +1,197 @@
+"""LRU cache of per-location results, shared by users in the same location cell."""
+
+import math
+import threading
+from collections import OrderedDict
+
+from app.config import RESULT_CACHE_SETTINGS
+
+
+def location_key(version, latitude, longitude, cell_deg=None):
+    """
+    Build a cache key from a dataset version and a quantized location.
+
+    Args:
+        version: Dataset version the result is computed against
+        latitude: User's latitude
+        longitude: User's longitude
+        cell_deg: Quantization cell size in degrees (defaults to config)
+
+    Returns:
+        tuple: (version, cell_row, cell_col)
+    """
+    cell_deg = cell_deg or RESULT_CACHE_SETTINGS["location_cell_deg"]
+    return (version, math.floor(latitude / cell_deg), math.floor(longitude / cell_deg))
+
+
+def cell_center(key, cell_deg=None):
+    """
+    Return the (latitude, longitude) at the centre of a key's location cell.
+
+    Results are computed at the cell centre so every user sharing a cell
+    gets exactly the same answer regardless of who populated the entry.
+    Distances are then off by at most half the cell diagonal, so cells must
+    stay far smaller than the on-site radius and the displayed precision.
+    """
+    cell_deg = cell_deg or RESULT_CACHE_SETTINGS["location_cell_deg"]
+    _, row, col = key
+    return (row + 0.5) * cell_deg, (col + 0.5) * cell_deg
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache bounded by entry count and estimated memory.
+
+    Entries are evicted least-recently-used first whenever either budget is
+    exceeded. Hit, miss and eviction counters are kept for monitoring.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, size_of=None):
+        """
+        Args:
+            max_entries: Maximum number of entries (defaults to config)
+            max_bytes: Maximum estimated total size in bytes (defaults to config)
+            size_of: Callable estimating an entry's size in bytes
+        """
+        self.max_entries = max_entries or RESULT_CACHE_SETTINGS["max_entries"]
+        self.max_bytes = max_bytes or RESULT_CACHE_SETTINGS["max_bytes"]
+        self.size_of = size_of or (lambda value: 0)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached value for key (marking it recently used), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Insert or replace a value, evicting old entries to stay within budget."""
+        size = self.size_of(value)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._trim()
+
+    def resize(self, key, value):
+        """
+        Re-measure an entry whose value grew in place (e.g. a body that built a
+        compressed variant), evicting others if the budget is now exceeded.
+
+        Nothing happens if key no longer holds value.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not value:
+                return
+            size = self.size_of(value)
+            if size != entry[1]:
+                self._entries[key] = (value, size)
+                self._bytes += size - entry[1]
+                self._trim()
+
+    def _trim(self):
+        """Evict least recently used entries until both budgets hold (lock held)."""
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for key, computing and caching it on a miss.
+
+        Args:
+            key: Cache key
+            compute: Zero-argument callable producing the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def migrate(self, transform):
+        """
+        Re-key or rewrite entries, e.g. after a dataset change.
+
+        The transform runs outside the lock on a snapshot of the entries, so
+        lookups are not blocked meanwhile. Its result replaces an entry only
+        if that entry was not replaced or evicted in the meantime, and never
+        overwrites a value already cached under the new key.
+
+        Args:
+            transform: Callable taking (key, value) and returning a new
+                (key, value) pair to keep, or None to drop the entry
+
+        Returns:
+            int: Number of entries kept
+        """
+        with self._lock:
+            entries = [(key, value) for key, (value, _) in self._entries.items()]
+
+        migrated = {}
+        for key, value in entries:
+            result = transform(key, value)
+            if result is not None:
+                new_key, new_value = result
+                result = (new_key, new_value, self.size_of(new_value))
+            migrated[key] = (value, result)
+
+        kept = 0
+        with self._lock:
+            for key, (value, result) in migrated.items():
+                entry = self._entries.get(key)
+                if entry is None or entry[0] is not value:
+                    continue  # evicted or recomputed while transforming
+                del self._entries[key]
+                self._bytes -= entry[1]
+                if result is None:
+                    continue
+                new_key, new_value, size = result
+                if new_key in self._entries:
+                    continue
+                self._entries[new_key] = (new_value, size)
+                self._bytes += size
+                kept += 1
+            self._trim()
+            return kept
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return a dict of cache counters and current usage."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
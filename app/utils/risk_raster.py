@@ -0,0 +1,433 @@
+"""Precomputed lat/lon risk raster for constant-time zone lookups.
+
+Every cell of a regular lat/lon grid stores the worst safety level of the
+plants whose DISTANCE_THRESHOLDS radius may reach it, plus the IDs of
+the plants whose zone or on-site radius may reach it (CSR layout:
+``offsets`` into a flat ``plant_ids`` array). A point lookup is then an
+array index followed by an exact distance check against the handful of
+candidates in its cell.
+
+The arrays are saved as ``.npy`` files so a raster can be memory-mapped by
+any number of processes, and a single plant change only recomputes the
+cells its old and new radius rectangles touch.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from app.config import DISTANCE_THRESHOLDS, ON_SITE_DISTANCE_KM, RISK_RASTER_SETTINGS
+from app.utils.distance import distances_km
+from app.utils.proximity import ZONE_KEYS
+from app.utils.spatial_index import KM_PER_DEG_LAT, KM_PER_DEG_LON
+
+# Severity codes stored in the level grid; 0 means no plant zone can reach the cell
+LEVEL_CODES = {'Safe': 1, 'Moderate': 2, 'Dangerous': 3}
+LEVEL_NAMES = {code: level for level, code in LEVEL_CODES.items()}
+
+# Covers the whole globe, so plants added later anywhere still fall inside
+GLOBAL_BBOX = (-90.0, 90.0, -180.0, 180.0)
+
+ARRAYS = ('level', 'offsets', 'plant_ids', 'plant_latitudes', 'plant_longitudes', 'plant_levels')
+META = 'raster.json'
+
+
+def zone_radius_km(plant_levels):
+    """Return each plant's zone radius in km (0 for plants without a zone)."""
+    radii = np.zeros(len(plant_levels), dtype=np.float64)
+    for level, key in ZONE_KEYS.items():
+        radii[plant_levels == LEVEL_CODES[level]] = DISTANCE_THRESHOLDS[key]
+    return radii
+
+
+def reach_km(plant_levels):
+    """Return how far each plant can matter to a point: its zone or on-site radius."""
+    return np.maximum(zone_radius_km(plant_levels), ON_SITE_DISTANCE_KM)
+
+
+def raster_key(resolution_deg=None):
+    """
+    Name a saved raster after the settings it was built with.
+
+    A raster depends on the zone and on-site radii and the cell size as well
+    as the plant table, so changing any of them must not pick up a raster
+    saved before.
+
+    Args:
+        resolution_deg: Cell size in degrees (defaults to config)
+
+    Returns:
+        str: Directory name such as ``raster-<16 hex chars>``
+    """
+    material = json.dumps({
+        'thresholds': DISTANCE_THRESHOLDS,
+        'on_site_km': ON_SITE_DISTANCE_KM,
+        'resolution_deg': resolution_deg or RISK_RASTER_SETTINGS["resolution_deg"],
+    }, sort_keys=True)
+    return f"raster-{hashlib.sha256(material.encode()).hexdigest()[:16]}"
+
+
+class RiskRaster:
+    """A lat/lon grid of worst-case safety levels and candidate plants."""
+
+    def __init__(self, bbox, resolution_deg, level, offsets, plant_ids,
+                 plant_latitudes, plant_longitudes, plant_levels, version=None):
+        self.bbox = tuple(float(v) for v in bbox)
+        self.resolution = float(resolution_deg)
+        self.level = level
+        self.offsets = offsets
+        self.plant_ids = plant_ids
+        self.plant_latitudes = plant_latitudes
+        self.plant_longitudes = plant_longitudes
+        self.plant_levels = plant_levels
+        self.version = version
+        lat_min, lat_max, lon_min, lon_max = self.bbox
+        self.n_rows = int(np.ceil((lat_max - lat_min) / self.resolution))
+        self.n_cols = int(np.ceil((lon_max - lon_min) / self.resolution))
+        self.wraps = lon_max - lon_min >= 360
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def build(cls, latitudes, longitudes, safety, resolution_deg=None, bbox=None, version=None):
+        """
+        Build a raster over a plant table.
+
+        Args:
+            latitudes: Plant latitudes in degrees
+            longitudes: Plant longitudes in degrees
+            safety: Plant safety classifications ('Safe', 'Moderate', 'Dangerous')
+            resolution_deg: Cell size in degrees (defaults to config)
+            bbox: (lat_min, lat_max, lon_min, lon_max); defaults to the plants'
+                extent padded by the largest zone radius
+            version: Dataset version the raster was built from
+
+        Returns:
+            RiskRaster: The raster
+        """
+        resolution_deg = resolution_deg or RISK_RASTER_SETTINGS["resolution_deg"]
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        plant_levels = np.zeros(len(latitudes), dtype=np.uint8)
+        for level, code in LEVEL_CODES.items():
+            plant_levels[np.asarray(safety) == level] = code
+
+        if bbox is None:
+            bbox = cls._default_bbox(latitudes, longitudes, resolution_deg)
+        lat_min, lat_max, lon_min, lon_max = bbox
+        n_rows = int(np.ceil((lat_max - lat_min) / resolution_deg))
+        n_cols = int(np.ceil((lon_max - lon_min) / resolution_deg))
+
+        raster = cls(
+            bbox, resolution_deg,
+            level=np.zeros((n_rows, n_cols), dtype=np.uint8),
+            offsets=np.zeros(n_rows * n_cols + 1, dtype=np.int64),
+            plant_ids=np.empty(0, dtype=np.int32),
+            plant_latitudes=latitudes,
+            plant_longitudes=longitudes,
+            plant_levels=plant_levels,
+            version=version,
+        )
+
+        cells, ids = [], []
+        for plant_id in range(len(latitudes)):
+            covered = raster._covered_cells(plant_id)
+            cells.append(covered)
+            ids.append(np.full(len(covered), plant_id, dtype=np.int32))
+        raster._set_pairs(
+            np.concatenate(cells) if cells else np.empty(0, dtype=np.int64),
+            np.concatenate(ids) if ids else np.empty(0, dtype=np.int32),
+        )
+        return raster
+
+    @staticmethod
+    def _default_bbox(latitudes, longitudes, resolution_deg):
+        if not len(latitudes):
+            return (-90.0, 90.0, -180.0, 180.0)
+        pad_lat = max(DISTANCE_THRESHOLDS.values()) / KM_PER_DEG_LAT + resolution_deg
+        lat_min = max(-90.0, np.floor(latitudes.min() - pad_lat))
+        lat_max = min(90.0, np.ceil(latitudes.max() + pad_lat))
+        # Longitude padding grows towards the poles; keep it global when it gets large
+        pad_lon = 1.1 * max(DISTANCE_THRESHOLDS.values()) / (
+            KM_PER_DEG_LON * np.cos(np.radians(min(max(abs(lat_min), abs(lat_max)), 89.0)))
+        ) + resolution_deg
+        lon_min = np.floor(longitudes.min() - pad_lon)
+        lon_max = np.ceil(longitudes.max() + pad_lon)
+        if lon_min <= -180 or lon_max >= 180:
+            lon_min, lon_max = -180.0, 180.0
+        return (float(lat_min), float(lat_max), float(lon_min), float(lon_max))
+
+    def _covered_cells(self, plant_id):
+        """Flat indices of cells whose area may lie within the plant's zone or on-site radius."""
+        radius = reach_km(self.plant_levels[plant_id:plant_id + 1])[0]
+        latitude = self.plant_latitudes[plant_id]
+        longitude = self.plant_longitudes[plant_id]
+        lat_min, lat_max, lon_min, lon_max = self.bbox
+
+        dlat = radius / KM_PER_DEG_LAT
+        row_lo = int(np.floor((latitude - dlat - lat_min) / self.resolution))
+        row_hi = int(np.floor((latitude + dlat - lat_min) / self.resolution))
+        row_lo, row_hi = max(row_lo, 0), min(row_hi, self.n_rows - 1)
+        if row_lo > row_hi:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(row_lo, row_hi + 1)
+
+        widest = max(abs(latitude - dlat), abs(latitude + dlat))
+        dlon = np.inf if widest >= 89.0 else (
+            1.1 * radius / (KM_PER_DEG_LON * np.cos(np.radians(widest)))
+        )
+        if dlon >= 180 and self.wraps:
+            cols = np.arange(self.n_cols)
+        else:
+            col_lo = int(np.floor((longitude - dlon - lon_min) / self.resolution)) if np.isfinite(dlon) else 0
+            col_hi = int(np.floor((longitude + dlon - lon_min) / self.resolution)) if np.isfinite(dlon) else self.n_cols - 1
+            if self.wraps:
+                cols = np.unique(np.arange(col_lo, min(col_hi, col_lo + self.n_cols - 1) + 1) % self.n_cols)
+            else:
+                cols = np.arange(max(col_lo, 0), min(col_hi, self.n_cols - 1) + 1)
+        return (rows[:, None] * self.n_cols + cols[None, :]).ravel()
+
+    def _set_pairs(self, cells, ids):
+        """Rebuild the CSR arrays and level grid from (cell, plant) pairs."""
+        order = np.lexsort((ids, cells))
+        cells, ids = cells[order], ids[order]
+        n_cells = self.n_rows * self.n_cols
+        self.offsets = np.zeros(n_cells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=n_cells), out=self.offsets[1:])
+        self.plant_ids = ids.astype(np.int32)
+        level = np.zeros(n_cells, dtype=np.uint8)
+        np.maximum.at(level, cells, self.plant_levels[ids])
+        self.level = level.reshape(self.n_rows, self.n_cols)
+
+    # ---------------------------------------------------------------- lookups
+
+    def cell_index(self, latitudes, longitudes):
+        """
+        Return flat cell indices for points, and a mask of points inside the raster.
+        """
+        lat_min, _, lon_min, _ = self.bbox
+        rows = np.floor((np.asarray(latitudes) - lat_min) / self.resolution).astype(np.int64)
+        cols = np.floor((np.asarray(longitudes) - lon_min) / self.resolution).astype(np.int64)
+        if self.wraps:
+            cols %= self.n_cols
+        covered = (rows >= 0) & (rows < self.n_rows) & (cols >= 0) & (cols < self.n_cols)
+        cells = np.where(covered, rows * self.n_cols + cols, 0)
+        return cells, covered
+
+    def candidates(self, latitude, longitude):
+        """Return the candidate plant IDs for one point (empty outside the raster)."""
+        cells, covered = self.cell_index([latitude], [longitude])
+        if not covered[0]:
+            return np.empty(0, dtype=np.int32)
+        cell = cells[0]
+        return self.plant_ids[self.offsets[cell]:self.offsets[cell + 1]]
+
+    def worst_level(self, latitude, longitude):
+        """Worst safety level any plant zone may reach at a point, or None."""
+        cells, covered = self.cell_index([latitude], [longitude])
+        code = int(self.level.flat[cells[0]]) if covered[0] else 0
+        return LEVEL_NAMES.get(code)
+
+    def classify(self, latitudes, longitudes):
+        """
+        Classify many points with a cell lookup plus an exact check on candidates.
+
+        Args:
+            latitudes: Point latitudes in degrees
+            longitudes: Point longitudes in degrees
+
+        Returns:
+            dict: ``zone_hits`` (level -> (point, plant) index arrays),
+                ``on_site_hits`` ((point, plant) index arrays), ``pairs``
+                ((point, plant, distance) for every candidate checked) and
+                ``covered`` (mask of points inside the raster)
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        cells, covered = self.cell_index(latitudes, longitudes)
+        starts = np.where(covered, self.offsets[cells], 0)
+        counts = np.where(covered, self.offsets[cells + 1] - starts, 0)
+
+        # Expand every point into one row per candidate plant
+        points = np.repeat(np.arange(len(latitudes)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        plants = self.plant_ids[np.repeat(starts, counts) + within].astype(np.int64)
+        distances = distances_km(
+            latitudes[points], longitudes[points],
+            self.plant_latitudes[plants], self.plant_longitudes[plants]
+        )
+        radii = zone_radius_km(self.plant_levels[plants])
+        inside = distances <= radii
+
+        zone_hits = {}
+        for level, code in LEVEL_CODES.items():
+            mask = inside & (self.plant_levels[plants] == code)
+            zone_hits[level] = (points[mask], plants[mask])
+        on_site = distances <= ON_SITE_DISTANCE_KM
+
+        return {
+            'zone_hits': zone_hits,
+            'on_site_hits': (points[on_site], plants[on_site]),
+            'pairs': (points, plants, distances),
+            'covered': covered,
+        }
+
+    # ---------------------------------------------------------------- updates
+
+    def update_plant(self, plant_id, latitude=None, longitude=None, safety=None):
+        """
+        Add, move, reclassify or (with latitude=None) remove a plant.
+
+        Only the cells covered by the plant's old or new radius rectangle are
+        recomputed; every other cell keeps its candidates and level.
+
+        Args:
+            plant_id: Plant row ID (len(plant table) appends a new plant)
+            latitude: New latitude, or None to remove the plant from every cell
+            longitude: New longitude
+            safety: New safety classification
+        """
+        self._ensure_writable()
+        n_plants = len(self.plant_levels)
+        if plant_id > n_plants:
+            raise IndexError(f"Plant ID {plant_id} would leave a gap after {n_plants} plants")
+        if plant_id == n_plants:
+            self.plant_latitudes = np.append(self.plant_latitudes, 0.0)
+            self.plant_longitudes = np.append(self.plant_longitudes, 0.0)
+            self.plant_levels = np.append(self.plant_levels, np.uint8(0))
+            old_cells = np.empty(0, dtype=np.int64)
+        else:
+            old_cells = self._covered_cells(plant_id)
+
+        if latitude is None:
+            self.plant_levels[plant_id] = 0
+            new_cells = np.empty(0, dtype=np.int64)
+        else:
+            self.plant_latitudes[plant_id] = latitude
+            self.plant_longitudes[plant_id] = longitude
+            self.plant_levels[plant_id] = LEVEL_CODES.get(safety, 0)
+            new_cells = self._covered_cells(plant_id)
+
+        affected = np.union1d(old_cells, new_cells)
+        if not len(affected):
+            return
+
+        # Splice the new candidate lists of the affected cells into the CSR arrays
+        segments, lengths = [], []
+        previous_end = 0
+        new_set = set(new_cells.tolist())
+        for cell in affected.tolist():
+            start, end = self.offsets[cell], self.offsets[cell + 1]
+            segments.append(self.plant_ids[previous_end:start])
+            ids = self.plant_ids[start:end]
+            ids = ids[ids != plant_id]
+            if cell in new_set:
+                ids = np.sort(np.append(ids, np.int32(plant_id)))
+            segments.append(ids)
+            lengths.append(len(ids) - (end - start))
+            previous_end = end
+            self.level.flat[cell] = self.plant_levels[ids].max() if len(ids) else 0
+        segments.append(self.plant_ids[previous_end:])
+        self.plant_ids = np.concatenate(segments).astype(np.int32)
+
+        delta = np.zeros(len(self.offsets), dtype=np.int64)
+        delta[affected + 1] = lengths
+        self.offsets = self.offsets + np.cumsum(delta)
+
+    def updated(self, latitudes, longitudes, safety, positions, version=None):
+        """
+        Return a copy reflecting a changed plant table, updating only some plants.
+
+        The copy shares nothing this raster's readers could see change, and
+        each changed plant is applied with update_plant, so only the cells
+        its old and new radius rectangles touch are recomputed.
+
+        Args:
+            latitudes: Plant latitudes of the new table
+            longitudes: Plant longitudes of the new table
+            safety: Plant safety classifications of the new table
+            positions: Row positions whose plant changed, was added, or
+                (beyond the new table length) was removed
+            version: Dataset version of the new table
+
+        Returns:
+            RiskRaster: The updated raster
+        """
+        raster = copy.copy(self)
+        # offsets and plant_ids are replaced, never written, by update_plant
+        for name in ('level', 'plant_latitudes', 'plant_longitudes', 'plant_levels'):
+            setattr(raster, name, np.array(getattr(self, name)))
+        raster.version = version
+
+        n_plants = len(latitudes)
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        for plant_id in positions[positions >= n_plants][::-1].tolist():
+            raster.update_plant(plant_id)
+        for name in ('plant_latitudes', 'plant_longitudes', 'plant_levels'):
+            setattr(raster, name, getattr(raster, name)[:n_plants])
+        for plant_id in positions[positions < n_plants].tolist():
+            raster.update_plant(plant_id, latitudes[plant_id], longitudes[plant_id],
+                                safety[plant_id])
+        return raster
+
+    def _ensure_writable(self):
+        """Copy memory-mapped arrays into memory before mutating them."""
+        for name in ARRAYS:
+            array = getattr(self, name)
+            if isinstance(array, np.memmap) or not array.flags.writeable:
+                setattr(self, name, np.array(array))
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, directory):
+        """
+        Write the raster as memory-mappable ``.npy`` files plus metadata.
+
+        The files are written to a staging directory next to the target and
+        moved into place in one step, so readers never see a partial raster.
+        If another process saved the same raster first, its copy is kept.
+
+        Args:
+            directory: Target directory (its parent is created if needed)
+        """
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix='.staging-')
+        try:
+            for name in ARRAYS:
+                np.save(os.path.join(staging, f'{name}.npy'), getattr(self, name))
+            with open(os.path.join(staging, META), 'w') as f:
+                json.dump({
+                    'bbox': self.bbox,
+                    'resolution_deg': self.resolution,
+                    'version': self.version,
+                }, f)
+            os.replace(staging, directory)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isfile(os.path.join(directory, META)):
+                raise
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """
+        Load a saved raster, memory-mapping its arrays by default.
+
+        Args:
+            directory: Directory written by save()
+            mmap: Memory-map the arrays instead of reading them into memory
+
+        Returns:
+            RiskRaster: The raster
+        """
+        with open(os.path.join(directory, META)) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r' if mmap else None)
+            for name in ARRAYS
+        }
+        return cls(meta['bbox'], meta['resolution_deg'], version=meta['version'], **arrays)
@@ -0,0 +1,209 @@
+"""Grid bucket spatial index over plant coordinates for radius and bounding-box queries."""
+
+import numpy as np
+from app.config import SPATIAL_INDEX_SETTINGS
+from app.utils.distance import distances_km
+
+# Conservative kilometres-per-degree figures on WGS-84 (minimum meridional
+# degree length, equatorial parallel degree length)
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320
+
+
+class PlantGridIndex:
+    """
+    Bucket plants into fixed lat/lon cells so radius queries only touch nearby cells.
+
+    Build it once per dataset load; queries then cost time proportional to
+    the number of plants in the handful of cells around the query point,
+    not to the size of the registry.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_size_deg=None):
+        """
+        Build the index.
+
+        Args:
+            latitudes: Plant latitudes in degrees
+            longitudes: Plant longitudes in degrees
+            cell_size_deg: Cell edge length in degrees (defaults to config)
+        """
+        self.cell_size = float(cell_size_deg or SPATIAL_INDEX_SETTINGS["cell_size_deg"])
+        self.n_rows = int(np.ceil(180 / self.cell_size))
+        self.n_cols = int(np.ceil(360 / self.cell_size))
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+
+        keys = self._cell_keys(self.latitudes, self.longitudes)
+        order = np.argsort(keys, kind='stable')
+        cells, starts = np.unique(keys[order], return_index=True)
+        self._buckets = dict(zip(cells.tolist(), np.split(order, starts[1:])))
+
+    @classmethod
+    def from_dataframe(cls, df, cell_size_deg=None):
+        """Build an index over the Latitude/Longitude columns of a plant table."""
+        return cls(df['Latitude'].to_numpy(), df['Longitude'].to_numpy(), cell_size_deg)
+
+    def __len__(self):
+        return len(self.latitudes)
+
+    def _cell_rows(self, latitudes):
+        rows = np.floor((np.asarray(latitudes) + 90) / self.cell_size).astype(np.int64)
+        return np.clip(rows, 0, self.n_rows - 1)
+
+    def _cell_cols(self, longitudes):
+        cols = np.floor((np.asarray(longitudes) + 180) / self.cell_size).astype(np.int64)
+        return cols % self.n_cols
+
+    def _cell_keys(self, latitudes, longitudes):
+        return self._cell_rows(latitudes) * self.n_cols + self._cell_cols(longitudes)
+
+    def candidates(self, latitude, longitude, radius_km):
+        """
+        Return row positions of plants in cells that may lie within the radius.
+
+        Args:
+            latitude: Query latitude in degrees
+            longitude: Query longitude in degrees
+            radius_km: Search radius in kilometres
+
+        Returns:
+            numpy.ndarray: Sorted candidate row positions (a superset of the hits)
+        """
+        dlat = radius_km / KM_PER_DEG_LAT
+        lat_min, lat_max = latitude - dlat, latitude + dlat
+        row_lo, row_hi = self._cell_rows([lat_min, lat_max])
+
+        widest = max(abs(lat_min), abs(lat_max))
+        if widest >= 89.0:
+            col_range = range(self.n_cols)
+        else:
+            # 10% slack covers great-circle bulge towards the pole
+            dlon = 1.1 * radius_km / (KM_PER_DEG_LON * np.cos(np.radians(widest)))
+            if dlon >= 180:
+                col_range = range(self.n_cols)
+            else:
+                col_lo = int(np.floor((longitude - dlon + 180) / self.cell_size))
+                col_hi = int(np.floor((longitude + dlon + 180) / self.cell_size))
+                col_range = range(col_lo, min(col_hi, col_lo + self.n_cols - 1) + 1)
+
+        buckets = []
+        for row in range(int(row_lo), int(row_hi) + 1):
+            for col in col_range:
+                bucket = self._buckets.get(row * self.n_cols + col % self.n_cols)
+                if bucket is not None:
+                    buckets.append(bucket)
+
+        if not buckets:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(buckets))
+
+    def query_radius(self, latitude, longitude, radius_km):
+        """
+        Find plants within a radius, computing exact distances for candidates only.
+
+        Args:
+            latitude: Query latitude in degrees
+            longitude: Query longitude in degrees
+            radius_km: Search radius in kilometres
+
+        Returns:
+            tuple: (row positions, distances in km), both sorted by row position
+        """
+        candidates = self.candidates(latitude, longitude, radius_km)
+        distances = distances_km(
+            latitude, longitude,
+            self.latitudes[candidates], self.longitudes[candidates]
+        )
+        within = distances <= radius_km
+        return candidates[within], distances[within]
+
+    def query_bbox(self, south, west, north, east):
+        """
+        Find plants inside a lat/lon bounding box.
+
+        The box may cross the antimeridian (west > east after normalising
+        longitudes to [-180, 180)), as Leaflet reports when the map is panned
+        across it.
+
+        Args:
+            south: Southern latitude bound
+            west: Western longitude bound
+            north: Northern latitude bound
+            east: Eastern longitude bound
+
+        Returns:
+            numpy.ndarray: Sorted row positions of plants inside the box
+        """
+        row_lo, row_hi = self._cell_rows([max(south, -90.0), min(north, 90.0)])
+        if east - west >= 360:
+            west, east = -180.0, 180.0
+            col_ranges = [range(self.n_cols)]
+        else:
+            west = (west + 180) % 360 - 180
+            east = (east + 180) % 360 - 180
+            col_lo, col_hi = self._cell_cols([west, east])
+            if west <= east:
+                col_ranges = [range(col_lo, col_hi + 1)]
+            else:
+                col_ranges = [range(col_lo, self.n_cols), range(0, col_hi + 1)]
+
+        buckets = []
+        for row in range(int(row_lo), int(row_hi) + 1):
+            for col_range in col_ranges:
+                for col in col_range:
+                    bucket = self._buckets.get(row * self.n_cols + col)
+                    if bucket is not None:
+                        buckets.append(bucket)
+        if not buckets:
+            return np.empty(0, dtype=np.int64)
+
+        candidates = np.sort(np.concatenate(buckets))
+        latitudes = self.latitudes[candidates]
+        longitudes = self.longitudes[candidates]
+        inside = (latitudes >= south) & (latitudes <= north)
+        if west <= east:
+            inside &= (longitudes >= west) & (longitudes <= east)
+        else:
+            inside &= (longitudes >= west) | (longitudes <= east)
+        return candidates[inside]
+
+    def updated(self, latitudes, longitudes, positions):
+        """
+        Return a new index over changed coordinates, re-bucketing only some rows.
+
+        The new index shares every untouched bucket with this one, so the
+        cost is proportional to the number of changed rows, not the table.
+
+        Args:
+            latitudes: Plant latitudes of the new table
+            longitudes: Plant longitudes of the new table
+            positions: Row positions whose plant changed, was added, or
+                (beyond the new table length) was removed
+
+        Returns:
+            PlantGridIndex: The updated index
+        """
+        index = object.__new__(type(self))
+        index.cell_size, index.n_rows, index.n_cols = self.cell_size, self.n_rows, self.n_cols
+        index.latitudes = np.asarray(latitudes, dtype=np.float64)
+        index.longitudes = np.asarray(longitudes, dtype=np.float64)
+        index._buckets = dict(self._buckets)
+
+        positions = np.unique(np.asarray(positions, dtype=np.int64))
+        old = positions[positions < len(self)]
+        new = positions[positions < len(index)]
+        changed = {}
+        for key in set(self._cell_keys(self.latitudes[old], self.longitudes[old]).tolist()):
+            bucket = index._buckets[key]
+            changed[key] = bucket[~np.isin(bucket, old)]
+        for key, position in zip(index._cell_keys(index.latitudes[new], index.longitudes[new]).tolist(),
+                                 new.tolist()):
+            bucket = changed.get(key, index._buckets.get(key, np.empty(0, dtype=np.int64)))
+            changed[key] = np.append(bucket, position)
+        for key, bucket in changed.items():
+            if len(bucket):
+                index._buckets[key] = np.sort(bucket)
+            else:
+                index._buckets.pop(key, None)
+        return index
@@ -0,0 +1,209 @@
+"""On-disk columnar cache of the processed plant table.
+
+Each processed table is stored as one ``.npy`` file per column (memory
+mappable) plus a ``manifest.json``, in a directory named after a key
+derived from the source file's SHA-256 and everything else the processing
+depends on. A small ``sources.json`` index maps source paths to their last
+seen (mtime, size, digest), so a warm start can find its cache entry
+without reading the CSV at all.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from app.config import SAFETY_THRESHOLDS, TABLE_CACHE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# Bump when the processed table layout or derivation changes
+CACHE_FORMAT_VERSION = 4
+
+SOURCES_INDEX = 'sources.json'
+MANIFEST = 'manifest.json'
+
+
+def file_digest(path):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path, payload):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(payload, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class TableCache:
+    """Columnar cache of processed plant tables keyed by source content."""
+
+    def __init__(self, directory=None, max_entries=None):
+        """
+        Args:
+            directory: Cache directory (defaults to config, relative to the project root)
+            max_entries: Number of cached tables to keep (defaults to config)
+        """
+        if directory is None:
+            base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+            directory = os.path.join(base_dir, TABLE_CACHE_SETTINGS["directory"])
+        self.directory = directory
+        self.max_entries = max_entries or TABLE_CACHE_SETTINGS["max_entries"]
+        os.makedirs(self.directory, exist_ok=True)
+
+    def source_digest(self, data_path):
+        """
+        Return the source file digest, hashing only if its mtime or size changed.
+
+        Args:
+            data_path: Path to the source CSV
+
+        Returns:
+            str: SHA-256 hex digest of the source file
+        """
+        real_path = os.path.realpath(data_path)
+        stat = os.stat(real_path)
+        index_path = os.path.join(self.directory, SOURCES_INDEX)
+        sources = _read_json(index_path) or {}
+
+        seen = sources.get(real_path)
+        if seen and seen['mtime_ns'] == stat.st_mtime_ns and seen['size'] == stat.st_size:
+            return seen['digest']
+
+        digest = file_digest(real_path)
+        sources[real_path] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'digest': digest}
+        try:
+            _write_json_atomic(index_path, sources)
+        except OSError:
+            logger.warning("Could not update plant table cache index %s", index_path)
+        return digest
+
+    def key(self, digest):
+        """
+        Derive the cache key for a source digest.
+
+        Ages are derived relative to the current year and bucketed with
+        SAFETY_THRESHOLDS, so both are part of the key.
+        """
+        material = json.dumps({
+            'format': CACHE_FORMAT_VERSION,
+            'source': digest,
+            'year': datetime.now().year,
+            'safety_thresholds': SAFETY_THRESHOLDS,
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()[:24]
+
+    def entry_path(self, digest):
+        """
+        Return the directory holding a digest's cached columns.
+
+        Other processes can ``np.load(..., mmap_mode='r')`` the ``<column>.npy``
+        files in it to share the table without copying it.
+        """
+        return os.path.join(self.directory, f'plants-{self.key(digest)}')
+
+    def load(self, digest):
+        """
+        Load a cached table with its numeric columns memory-mapped.
+
+        Args:
+            digest: Source file digest
+
+        Returns:
+            DataFrame or None: The processed table, or None on a cache miss
+        """
+        entry = self.entry_path(digest)
+        manifest = _read_json(os.path.join(entry, MANIFEST))
+        if manifest is None:
+            return None
+
+        columns = {}
+        try:
+            categories = manifest.get('categories', {})
+            for name, kind in manifest['columns']:
+                array = np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='r')
+                if kind == 'category':
+                    columns[name] = pd.Categorical(
+                        array.astype(object), categories=categories[name], ordered=True
+                    )
+                else:
+                    columns[name] = array.astype(object) if kind == 'str' else array
+        except (OSError, ValueError):
+            logger.warning("Discarding unreadable plant table cache entry %s", entry)
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        return pd.DataFrame(columns, copy=False)
+
+    def store(self, digest, df):
+        """
+        Write a processed table to the cache atomically.
+
+        Args:
+            digest: Source file digest
+            df: Processed plant DataFrame
+        """
+        entry = self.entry_path(digest)
+        if os.path.isdir(entry):
+            return
+
+        staging = None
+        try:
+            staging = tempfile.mkdtemp(dir=self.directory, prefix='.staging-')
+            columns = []
+            categories = {}
+            for name in df.columns:
+                values = df[name].to_numpy()
+                if isinstance(df[name].dtype, pd.CategoricalDtype):
+                    # Values stay plain strings on disk so other readers need no codebook
+                    values = values.astype(str)
+                    kind = 'category'
+                    categories[name] = df[name].cat.categories.tolist()
+                elif values.dtype.kind in 'biuf':
+                    kind = 'num'
+                else:
+                    values = values.astype(str)
+                    kind = 'str'
+                np.save(os.path.join(staging, f'{name}.npy'), values)
+                columns.append((name, kind))
+            _write_json_atomic(os.path.join(staging, MANIFEST), {
+                'columns': columns,
+                'categories': categories,
+                'rows': len(df),
+                'source_digest': digest,
+            })
+            os.rename(staging, entry)
+        except OSError:
+            # Another worker won the race or the disk is read-only; either way
+            # the in-memory table is still good
+            if staging:
+                shutil.rmtree(staging, ignore_errors=True)
+            return
+        self._prune()
+
+    def _prune(self):
+        entries = sorted(
+            (os.path.join(self.directory, name) for name in os.listdir(self.directory)
+             if name.startswith('plants-')),
+            key=os.path.getmtime,
+            reverse=True,
+        )
+        for stale in entries[self.max_entries:]:
+            shutil.rmtree(stale, ignore_errors=True)
@@ -0,0 +1,340 @@
+"""Live location tracking with movement-bounded zone recomputation."""
+
+import json
+import queue
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from app.config import DISTANCE_THRESHOLDS, ON_SITE_DISTANCE_KM, TRACKING_SETTINGS
+from app.utils.distance import distances_km
+from app.utils.proximity import ZONE_KEYS, zone_masks
+
+
+def zone_radii(safety):
+    """
+    Return each plant's zone radius in km (NaN for plants without a zone).
+
+    Args:
+        safety: Array of safety classifications
+    """
+    safety = np.asarray(safety)
+    radii = np.full(len(safety), np.nan)
+    for level, key in ZONE_KEYS.items():
+        radii[safety == level] = DISTANCE_THRESHOLDS[key]
+    return radii
+
+
+def boundary_candidates(distances, radii, moved_km):
+    """
+    Return indices of plants that may have crossed a boundary after a move.
+
+    By the triangle inequality a move of ``moved_km`` changes every plant
+    distance by at most ``moved_km``, so only plants whose distance was
+    within that margin of their zone radius (or of the on-site radius) can
+    have changed membership.
+
+    Args:
+        distances: Distances in km measured from the anchor position
+        radii: Zone radius of each plant, aligned with distances
+        moved_km: Distance from the anchor, plus any error allowance
+
+    Returns:
+        numpy.ndarray: Indices into distances
+    """
+    return np.flatnonzero(
+        (np.abs(distances - radii) <= moved_km)
+        | (np.abs(distances - ON_SITE_DISTANCE_KM) <= moved_km)
+    )
+
+
+def zone_members(safety, positions, distances):
+    """
+    Return the plants inside each zone.
+
+    Args:
+        safety: Safety classifications of the whole snapshot
+        positions: Row positions of the plants to classify
+        distances: Their distances in km from the user
+
+    Returns:
+        dict: Safety level (and 'on_site') -> sorted row positions
+    """
+    members = {
+        level: positions[mask]
+        for level, mask in zone_masks(safety[positions], distances).items()
+    }
+    members['on_site'] = positions[distances <= ON_SITE_DISTANCE_KM]
+    return members
+
+
+@dataclass(frozen=True)
+class TrackState:
+    """
+    Zone state of one subject.
+
+    Only the plants within reach of a boundary before the next rebase are
+    kept (``watched``), with their distances from the anchor position where
+    they were last measured exactly. Every other plant is farther than
+    ``rebase_km`` outside its zone and cannot change membership until the
+    subject moves far enough from the anchor to force a rebase.
+    """
+
+    version: str
+    anchor: tuple
+    watched: np.ndarray
+    watched_distances: np.ndarray
+    watched_radii: np.ndarray
+    anchor_members: dict
+    position: tuple
+    members: dict
+    event: dict
+
+
+@dataclass(frozen=True)
+class TrackUpdate:
+    """Outcome of one location update."""
+
+    mode: str  # 'skipped', 'partial' or 'full'
+    candidates: int  # plants whose distance was recomputed
+    changed: bool  # zone or on-site membership changed
+    event: dict  # current zone state (None when never computed)
+
+
+class Subscription:
+    """
+    A bounded queue of (name, data, id) events for one stream.
+
+    The oldest event is dropped when the queue is full.
+    """
+
+    def __init__(self, size):
+        self._queue = queue.Queue(maxsize=size)
+
+    def put(self, event):
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Return the next event, or None if none arrived within the timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class LocationTracker:
+    """
+    Track per-subject zone state across location updates and fan out changes.
+
+    An update within ``min_move_km`` of the last evaluated position is
+    skipped. Otherwise, if the subject is still within ``rebase_km`` of its
+    anchor, only the watched plants near a boundary are re-measured; beyond
+    that (or when the dataset version changed) the state is rebuilt around
+    the new position with a spatial index query.
+
+    State is held in process memory: updates and streams for a subject must
+    reach the same process.
+    """
+
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings: Tracking settings (defaults to TRACKING_SETTINGS)
+        """
+        settings = settings or TRACKING_SETTINGS
+        self.min_move_km = settings["min_move_km"]
+        self.rebase_km = settings["rebase_km"]
+        self.slack_km = settings["slack_km"]
+        self.max_subjects = settings["max_subjects"]
+        self.queue_size = settings["queue_size"]
+        # Farthest a plant can be from the anchor and still cross a boundary before a rebase
+        self.watch_radius_km = (max(DISTANCE_THRESHOLDS.values(), default=0)
+                                + self.rebase_km + self.slack_km)
+        self._states = OrderedDict()
+        self._subscribers = {}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.full_updates = 0
+        self.partial_updates = 0
+        self.skipped_updates = 0
+        self.recomputed_plants = 0
+
+    def _anchor(self, snapshot, latitude, longitude):
+        """Measure the plants within watch range of a new anchor position."""
+        watched, distances = snapshot.index.query_radius(latitude, longitude, self.watch_radius_km)
+        members = zone_members(snapshot.safety, watched, distances)
+        return watched, distances, zone_radii(snapshot.safety[watched]), members
+
+    def _event(self, snapshot, latitude, longitude, members):
+        names = snapshot.names
+        zones = {level: names[members[level]].tolist() for level in ZONE_KEYS}
+        alert = next((level for level in ZONE_KEYS if zones[level]), None)
+        return {
+            'dataset_version': snapshot.version,
+            'latitude': latitude,
+            'longitude': longitude,
+            'alert_level': alert.lower() if alert else None,
+            'alert_plants': zones[alert] if alert else [],
+            'safe_zones': zones['Safe'],
+            'moderate_zones': zones['Moderate'],
+            'dangerous_zones': zones['Dangerous'],
+            'on_site_plants': names[members['on_site']].tolist(),
+        }
+
+    def update(self, subject, snapshot, latitude, longitude):
+        """
+        Record a new position for a subject and recompute what it could have changed.
+
+        Args:
+            subject: Subject identifier (e.g. a session's tracking ID)
+            snapshot: Current PlantSnapshot
+            latitude: New latitude in degrees
+            longitude: New longitude in degrees
+
+        Returns:
+            TrackUpdate: What was recomputed and the resulting zone state
+        """
+        with self._lock:
+            state = self._states.get(subject)
+
+        if state is not None and state.version == snapshot.version:
+            moved = float(distances_km(*state.position, latitude, longitude))
+            if moved < self.min_move_km:
+                with self._lock:
+                    self.skipped_updates += 1
+                return TrackUpdate('skipped', 0, False, state.event)
+            from_anchor = float(distances_km(*state.anchor, latitude, longitude))
+        else:
+            from_anchor = None
+
+        if from_anchor is not None and from_anchor <= self.rebase_km:
+            mode = 'partial'
+            anchor = state.anchor
+            watched, watched_distances, watched_radii = (
+                state.watched, state.watched_distances, state.watched_radii
+            )
+            anchor_members = state.anchor_members
+            candidates = boundary_candidates(watched_distances, watched_radii,
+                                             from_anchor + self.slack_km)
+            positions = watched[candidates]
+            exact = distances_km(latitude, longitude,
+                                 snapshot.latitudes[positions], snapshot.longitudes[positions])
+            updated = zone_members(snapshot.safety, positions, exact)
+            members = {
+                key: np.union1d(np.setdiff1d(anchor_members[key], positions), updated[key])
+                for key in anchor_members
+            }
+            recomputed = len(positions)
+        else:
+            mode = 'full'
+            anchor = (latitude, longitude)
+            watched, watched_distances, watched_radii, anchor_members = self._anchor(
+                snapshot, latitude, longitude
+            )
+            members = anchor_members
+            recomputed = len(watched)
+
+        event = self._event(snapshot, latitude, longitude, members)
+        previous = state.event if state is not None else None
+        changed = previous is None or any(
+            event[key] != previous[key]
+            for key in ('safe_zones', 'moderate_zones', 'dangerous_zones', 'on_site_plants')
+        )
+
+        with self._lock:
+            if changed:
+                self._sequence += 1
+                event['id'] = self._sequence
+            else:
+                event['id'] = previous['id']
+            self._states[subject] = TrackState(
+                version=snapshot.version,
+                anchor=anchor,
+                watched=watched,
+                watched_distances=watched_distances,
+                watched_radii=watched_radii,
+                anchor_members=anchor_members,
+                position=(latitude, longitude),
+                members=members,
+                event=event,
+            )
+            self._states.move_to_end(subject)
+            while len(self._states) > self.max_subjects:
+                self._states.popitem(last=False)
+            if mode == 'full':
+                self.full_updates += 1
+            else:
+                self.partial_updates += 1
+            self.recomputed_plants += recomputed
+
+        if changed:
+            self.publish(subject, 'zones', event, event['id'])
+        return TrackUpdate(mode, recomputed, changed, event)
+
+    def publish(self, subject, name, data, event_id=None):
+        """Send an event to every open stream of a subject."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(subject, ()))
+        for subscription in subscribers:
+            subscription.put((name, data, event_id))
+
+    def latest(self, subject):
+        """Return the subject's current zone event, or None if it has not been tracked."""
+        with self._lock:
+            state = self._states.get(subject)
+            return state.event if state is not None else None
+
+    def subscribe(self, subject):
+        """Return a Subscription that receives the subject's zone changes."""
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(subject, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subject, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subject)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subject]
+
+    def stats(self):
+        """Return a dict of tracking counters."""
+        with self._lock:
+            return {
+                'subjects': len(self._states),
+                'streams': sum(len(s) for s in self._subscribers.values()),
+                'full_updates': self.full_updates,
+                'partial_updates': self.partial_updates,
+                'skipped_updates': self.skipped_updates,
+                'recomputed_plants': self.recomputed_plants,
+            }
+
+
+def sse_message(event, data, event_id=None):
+    """
+    Format one Server-Sent Events message.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+        event_id: Optional ID the browser echoes back as Last-Event-ID
+
+    Returns:
+        str: The message, terminated by a blank line
+    """
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,88 @@
+"""Benchmark the vectorized distance engine against the geopy geodesic loop.
+
+Usage:
+    python benchmarks/bench_distances.py [--sizes 1000 100000 1000000] [--loop-limit 20000]
+
+The geodesic loop is timed on at most ``--loop-limit`` plants and
+extrapolated linearly beyond that, since a million geopy calls take
+minutes. Extrapolated figures are marked with ``~``.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from geopy.distance import geodesic
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import DEFAULT_LOCATION  # noqa: E402
+from app.utils.data_processor import calculate_distances  # noqa: E402
+from app.utils.distance import distances_km  # noqa: E402
+
+
+def synthetic_plants(n, seed=0):
+    """Build a synthetic plant table with uniformly spread coordinates."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Name': [f'Plant {i}' for i in range(n)],
+        'Latitude': rng.uniform(-60, 70, n),
+        'Longitude': rng.uniform(-180, 180, n),
+        'Age': rng.integers(0, 60, n),
+        'Safety': 'Safe',
+    })
+
+
+def geodesic_loop(df, user_latitude, user_longitude):
+    """The pre-vectorization implementation: one geodesic object per plant."""
+    return [
+        geodesic((user_latitude, user_longitude), (row['Latitude'], row['Longitude'])).km
+        for _, row in df.iterrows()
+    ]
+
+
+def best_of(fn, repeat):
+    """Return the fastest wall time of ``repeat`` runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--loop-limit', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    lat, lon = DEFAULT_LOCATION['latitude'], DEFAULT_LOCATION['longitude']
+
+    print(f"{'plants':>10} {'geodesic loop':>15} {'array engine':>14} "
+          f"{'calculate_distances':>20} {'speedup':>9} {'max err (ppm)':>14}")
+    for n in args.sizes:
+        df = synthetic_plants(n)
+        lats, lons = df['Latitude'].to_numpy(), df['Longitude'].to_numpy()
+
+        loop_n = min(n, args.loop_limit)
+        sample = df.iloc[:loop_n]
+        loop_time = best_of(lambda: geodesic_loop(sample, lat, lon), 1) * n / loop_n
+        array_time = best_of(lambda: distances_km(lat, lon, lats, lons), args.repeat)
+        wrapper_time = best_of(lambda: calculate_distances(df, lat, lon), args.repeat)
+
+        reference = np.array(geodesic_loop(sample.iloc[:2_000], lat, lon))
+        error_ppm = (np.abs(distances_km(lat, lon, lats[:2_000], lons[:2_000]) - reference)
+                     / reference).max() * 1e6
+
+        marker = '~' if loop_n < n else ' '
+        print(f"{n:>10} {marker}{loop_time:>13.3f}s {array_time:>13.4f}s "
+              f"{wrapper_time:>19.4f}s {loop_time / array_time:>8.0f}x {error_ppm:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Benchmark vectorized age derivation and safety binning against row-wise apply.
+
+Usage:
+    python benchmarks/bench_ingestion.py [--sizes 10000 100000 1000000] [--apply-limit 200000]
+
+The row-wise implementation is timed on at most ``--apply-limit`` rows and
+extrapolated linearly beyond that. Extrapolated figures are marked with ``~``.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.data_processor import calculate_safety, classify_safety, derive_ages  # noqa: E402
+
+
+def synthetic_registry(n, seed=0):
+    """Build a raw registry with dd-mm-yyyy OperationalFrom dates and gaps in Age."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('1955-01-01') + rng.integers(0, 70 * 365, n).astype('timedelta64[D]')
+    dates = pd.Series(pd.to_datetime(start).strftime('%d-%m-%Y'))
+    dates[rng.random(n) < 0.1] = np.nan
+    ages = pd.Series(rng.integers(1, 60, n).astype(np.float64))
+    ages[rng.random(n) < 0.5] = np.nan
+    return pd.DataFrame({'Age': ages, 'OperationalFrom': dates})
+
+
+def rowwise_ingest(df):
+    """The pre-vectorization implementation: apply over rows, then over ages."""
+    current_year = datetime.now().year
+
+    def calculate_age(x):
+        if pd.isna(x):
+            return 0
+        try:
+            date_str = str(x)
+            if len(date_str) >= 4:
+                year = int(date_str[:4])
+                return max(0, current_year - year)
+        except:  # noqa: E722
+            pass
+        return 0
+
+    ages = df.apply(
+        lambda row: row['Age'] if pd.notna(row['Age']) and row['Age'] > 0
+        else calculate_age(row.get('OperationalFrom', 0)),
+        axis=1
+    )
+    return ages, ages.apply(calculate_safety)
+
+
+def vectorized_ingest(df):
+    """The current implementation: bulk date parsing and pd.cut binning."""
+    ages = df['Age'].where(df['Age'] > 0, derive_ages(df['OperationalFrom']))
+    return ages, classify_safety(ages)
+
+
+def reference_ages(df):
+    """Per-row strptime ages, to check the bulk parser on a sample."""
+    current_year = datetime.now().year
+    return [
+        age if pd.notna(age) and age > 0
+        else (current_year - datetime.strptime(date, '%d-%m-%Y').year if pd.notna(date) else 0)
+        for age, date in zip(df['Age'], df['OperationalFrom'])
+    ]
+
+
+def best_of(fn, repeat):
+    """Return the fastest wall time of ``repeat`` runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--apply-limit', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'row-wise apply':>16} {'vectorized':>12} {'speedup':>9} {'ages match':>11}")
+    for n in args.sizes:
+        df = synthetic_registry(n)
+
+        apply_n = min(n, args.apply_limit)
+        sample = df.iloc[:apply_n]
+        apply_time = best_of(lambda: rowwise_ingest(sample), 1) * n / apply_n
+        vector_time = best_of(lambda: vectorized_ingest(df), args.repeat)
+
+        check = df.iloc[:10_000]
+        ages, safety = vectorized_ingest(check)
+        expected = reference_ages(check)
+        matches = (np.allclose(ages.to_numpy(), expected)
+                   and list(safety) == [calculate_safety(age) for age in expected])
+
+        marker = '~' if apply_n < n else ' '
+        print(f"{n:>10} {marker}{apply_time:>14.3f}s {vector_time:>11.4f}s "
+              f"{apply_time / vector_time:>8.0f}x {str(matches):>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Compare request throughput of the debug server (run.py) and the production server (serve.py).
+
+Usage:
+    python benchmarks/bench_serving.py [--clients 16] [--duration 15] [--workers 4 --threads 4]
+
+Each server is started in turn on a free local port. Every client thread
+opens its own keep-alive connection, gets a session from /skip_intro and
+then requests ``--path`` in a loop for ``--duration`` seconds. Throughput
+and latency percentiles are reported per server.
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEBUG_SERVER = """
+import sys
+from app.main import create_app
+create_app().run(debug=True, host='127.0.0.1', port=int(sys.argv[1]))
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not come up")
+
+
+def client(port, path, stop_at, latencies, errors):
+    """Run one keep-alive client until stop_at, recording request latencies."""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request('POST', '/skip_intro')
+        response = conn.getresponse()
+        response.read()
+        cookie = response.getheader('Set-Cookie', '').split(';')[0]
+        headers = {'Cookie': cookie, 'Accept-Encoding': 'gzip'}
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+            latencies.append(time.perf_counter() - started)
+    except (OSError, http.client.HTTPException) as e:
+        errors.append(repr(e))
+    finally:
+        conn.close()
+
+
+def run_load(port, path, clients, duration):
+    latencies, errors = [], []
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=client, args=(port, path, stop_at, latencies, errors))
+        for _ in range(clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies, errors
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def start_server(kind, port, args):
+    if kind == 'debug':
+        command = [sys.executable, '-c', DEBUG_SERVER, str(port)]
+    else:
+        command = [sys.executable, 'serve.py', '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(args.workers), '--threads', str(args.threads)]
+    return subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, start_new_session=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() * 2 + 1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--path', default='/get_data?nearest=5&limit=50')
+    parser.add_argument('--servers', nargs='+', default=['debug', 'production'],
+                        choices=['debug', 'production'])
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients, {args.duration:.0f}s, GET {args.path}, {os.cpu_count()} CPUs")
+    print(f"{'server':>28} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for kind in args.servers:
+        port = free_port()
+        server = start_server(kind, port, args)
+        try:
+            wait_until_up(port)
+            run_load(port, args.path, args.clients, 2)  # warm caches and map files
+            rate, latencies, errors = run_load(port, args.path, args.clients, args.duration)
+        finally:
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait()
+        label = 'debug (run.py)' if kind == 'debug' else (
+            f'serve.py {args.workers}w x {args.threads}t')
+        print(f"{label:>28} {rate:>9.0f} {percentile(latencies, 0.5) * 1000:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1000:>8.1f} {len(errors):>7}")
+
+
+if __name__ == '__main__':
+    main()
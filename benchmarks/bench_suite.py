@@ -0,0 +1,294 @@
+"""Benchmark suite for the data, proximity, map and HTTP layers with regression checks.
+
+Usage:
+    python benchmarks/bench_suite.py                          # 1k, 10k, 100k, 1M plants
+    python benchmarks/bench_suite.py --scales 1000 10000 --stages ingest get_data
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --baseline benchmarks/baseline.json --tolerance 0.25
+
+Every stage runs against a synthetic plant registry at each scale and
+reports its best wall time over ``--repeat`` runs and its peak traced
+memory (measured in a separate run, since tracing slows code down).
+Stages with a row cap are skipped above it (folium markers at 1M plants
+would take hours and produce gigabytes of HTML).
+
+With ``--baseline`` the exit status is 1 if any stage got slower than the
+baseline by more than ``--tolerance`` (and by at least ``--min-delta-ms``,
+so sub-millisecond jitter is ignored), or used more than
+``--memory-tolerance`` (plus 1 MB) extra peak memory. Baselines are machine-specific:
+record them on the machine that checks against them.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import (  # noqa: E402
+    DEFAULT_LOCATION, MAP_CACHE_SETTINGS, PLANT_DATA_SETTINGS, TABLE_CACHE_SETTINGS
+)
+from app.utils.data_processor import (  # noqa: E402
+    calculate_distances, classify_zones, process_plant_data
+)
+from app.utils.map_utils import add_plant_markers, create_base_map, create_map  # noqa: E402
+from app.utils.plant_store import PlantSnapshot, load_plant_table  # noqa: E402
+from app.utils.proximity import batch_proximity, compute_proximity  # noqa: E402
+from app.utils.tracking import LocationTracker  # noqa: E402
+
+STATUSES = ['Operational', 'Shutdown', 'Planned', 'Under Construction']
+COUNTRIES = ['France', 'India', 'Japan', 'United States', 'Ukraine', 'China']
+
+# name -> (function building the timed callable from the context, max rows or None)
+STAGES = {}
+
+
+def stage(name, max_rows=None):
+    """Register a stage; the decorated function returns a zero-argument callable to time."""
+    def register(build):
+        STAGES[name] = (build, max_rows)
+        return build
+    return register
+
+
+def write_registry(path, n, seed=0):
+    """Write a raw registry CSV shaped like data/data2.csv, with gaps in Age."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('1955-01-01') + rng.integers(0, 70 * 365, n).astype('timedelta64[D]')
+    ages = rng.integers(0, 60, n).astype(np.float64)
+    ages[rng.random(n) < 0.3] = np.nan
+    pd.DataFrame({
+        'Name': [f'Plant {i}' for i in range(n)],
+        'Latitude': rng.uniform(-60, 70, n),
+        'Longitude': rng.uniform(-180, 180, n),
+        'Country': rng.choice(COUNTRIES, n),
+        'Status': rng.choice(STATUSES, n),
+        'OperationalFrom': pd.to_datetime(start).strftime('%d-%m-%Y'),
+        'IAEAId': np.arange(n),
+        'Age': ages,
+    }).to_csv(path, index=False)
+
+
+@stage('ingest')
+def _ingest(ctx):
+    return lambda: load_plant_table(ctx['csv'])
+
+
+@stage('process_plant_data')
+def _process(ctx):
+    raw = ctx['df'].drop(columns=['Safety'])
+    return lambda: process_plant_data(raw)
+
+
+@stage('snapshot')
+def _snapshot(ctx):
+    return lambda: PlantSnapshot.from_dataframe(ctx['df'], 'bench')
+
+
+@stage('calculate_distances')
+def _distances(ctx):
+    return lambda: calculate_distances(ctx['df'], ctx['lat'], ctx['lon'])
+
+
+@stage('classify_zones')
+def _zones(ctx):
+    index = ctx['snapshot'].index
+    return lambda: classify_zones(ctx['df'], ctx['lat'], ctx['lon'], index=index)
+
+
+@stage('compute_proximity')
+def _proximity(ctx):
+    return lambda: compute_proximity(ctx['df'], ctx['lat'], ctx['lon'])
+
+
+@stage('batch_proximity_1k_points', max_rows=100_000)
+def _batch(ctx):
+    snapshot = ctx['snapshot']
+    rng = np.random.default_rng(1)
+    lats, lons = rng.uniform(-60, 70, 1000), rng.uniform(-180, 180, 1000)
+    return lambda: batch_proximity(lats, lons, snapshot.latitudes, snapshot.longitudes,
+                                   snapshot.safety, nearest=3)
+
+
+@stage('track_update_100_steps')
+def _track(ctx):
+    snapshot = ctx['snapshot']
+    # A 1 km-per-step walk: mostly partial updates, with a rebase every ~25 steps
+    steps = [(ctx['lat'], ctx['lon'] + i * 0.01) for i in range(100)]
+
+    def walk():
+        tracker = LocationTracker()
+        for latitude, longitude in steps:
+            tracker.update('bench', snapshot, latitude, longitude)
+    return walk
+
+
+@stage('add_plant_markers', max_rows=10_000)
+def _markers(ctx):
+    def render():
+        map_obj = create_map(ctx['lat'], ctx['lon'])
+        add_plant_markers(map_obj, ctx['df'])
+        return map_obj.get_root().render()
+    return render
+
+
+@stage('create_base_map')
+def _base_map(ctx):
+    return lambda: create_base_map(ctx['df'], '/map_overlay', '/api/plants').get_root().render()
+
+
+@stage('load_data')
+def _load_data(ctx):
+    client = ctx['client']
+    app = ctx['app']
+
+    def request():
+        # Cold path: per-location result and serialized bodies are rebuilt
+        app.extensions['result_cache'].clear()
+        app.extensions['response_cache'].clear()
+        assert client.get('/load_data').status_code == 200
+    return request
+
+
+@stage('get_data')
+def _get_data(ctx):
+    client = ctx['client']
+    client.get('/load_data')
+
+    def request():
+        assert client.get('/get_data?nearest=5&limit=50').status_code == 200
+    return request
+
+
+def build_context(n, workdir):
+    """Build the registry, processed table, snapshot and an app serving it."""
+    csv = os.path.join(workdir, f'registry-{n}.csv')
+    write_registry(csv, n)
+    df = load_plant_table(csv)
+    ctx = {
+        'csv': csv,
+        'df': df,
+        'snapshot': PlantSnapshot.from_dataframe(df, 'bench'),
+        'lat': DEFAULT_LOCATION['latitude'],
+        'lon': DEFAULT_LOCATION['longitude'],
+    }
+
+    # The app reads these at create_app() time; point it at the synthetic data
+    from app.main import create_app
+    PLANT_DATA_SETTINGS['path'] = csv
+    MAP_CACHE_SETTINGS['directory'] = os.path.join(workdir, f'maps-{n}')
+    TABLE_CACHE_SETTINGS['enabled'] = False
+    # No real desktop notifications or geolocation lookups, and no background work in the timings
+    os.environ['NOTIFICATIONS_ENABLED'] = '0'
+    os.environ['FORCE_DEFAULT_LOCATION'] = '1'
+    app = create_app()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['show_intro'] = False
+    ctx.update(app=app, client=client)
+    return ctx
+
+
+def measure(fn, repeat):
+    """Return (best seconds, peak traced bytes) for a callable."""
+    timings = []
+    for _ in range(repeat):
+        # Like timeit: collector pauses are noise, not the stage's cost
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+        if timings[-1] > 5:
+            break  # slow stages are stable enough after one run
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def compare(result, baseline, args):
+    """Return a status string for one result against its baseline entry."""
+    if baseline is None:
+        return 'new'
+    problems = []
+    slower = result['seconds'] - baseline['seconds']
+    if (result['seconds'] > baseline['seconds'] * (1 + args.tolerance)
+            and slower * 1000 >= args.min_delta_ms):
+        problems.append(f"time +{slower / baseline['seconds']:.0%}")
+    if result['peak_bytes'] > baseline['peak_bytes'] * (1 + args.memory_tolerance) + 1024 * 1024:
+        problems.append(f"memory +{result['peak_bytes'] / max(baseline['peak_bytes'], 1) - 1:.0%}")
+    return 'REGRESSED (' + ', '.join(problems) + ')' if problems else 'ok'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+',
+                        default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', help='JSON baseline to check against')
+    parser.add_argument('--save-baseline', help='Write results to this JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative slowdown (default 0.25)')
+    parser.add_argument('--min-delta-ms', type=float, default=5.0,
+                        help='Ignore slowdowns smaller than this (default 5 ms)')
+    parser.add_argument('--memory-tolerance', type=float, default=0.25,
+                        help='Allowed relative peak memory growth (default 0.25)')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    regressions = 0
+    print(f"{'plants':>9} {'stage':<28} {'time':>10} {'peak MB':>9}  status")
+    with tempfile.TemporaryDirectory(prefix='bench-suite-') as workdir:
+        for n in args.scales:
+            ctx = build_context(n, workdir)
+            for name in args.stages:
+                build, max_rows = STAGES[name]
+                if max_rows is not None and n > max_rows:
+                    print(f"{n:>9} {name:<28} {'-':>10} {'-':>9}  skipped (> {max_rows:,} rows)")
+                    continue
+                seconds, peak = measure(build(ctx), args.repeat)
+                key = f"{name}@{n}"
+                results[key] = {'seconds': seconds, 'peak_bytes': peak}
+                status = compare(results[key], baseline.get(key), args) if args.baseline else ''
+                regressions += status.startswith('REGRESSED')
+                print(f"{n:>9} {name:<28} {seconds * 1000:>8.1f}ms {peak / 2**20:>9.1f}  {status}",
+                      flush=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': sys.version.split()[0],
+                'cpus': os.cpu_count(),
+                'results': results,
+            }, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if regressions:
+        print(f"{regressions} stage(s) regressed beyond tolerance")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""Report per-package import cost of app startup and fail when it exceeds a budget.
+
+Usage:
+    python benchmarks/check_startup.py [--budget-ms 1000] [--top 15]
+
+Starts a fresh interpreter with ``-X importtime`` that imports app.main,
+calls create_app() and renders the intro page (``GET /``), with
+FORCE_DEFAULT_LOCATION=1 and NOTIFICATIONS_ENABLED=0. Reports the
+cumulative import time of each top-level package and the startup phases.
+
+Exits with status 1 if startup (import + create_app + first request) takes
+longer than ``--budget-ms``, or if any of the deferred packages (folium,
+branca, geocoder, plyer) was imported: those must only load on first use.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Packages that must not be imported before a route actually needs them
+DEFERRED = ('folium', 'branca', 'geocoder', 'plyer')
+
+STARTUP = """
+import json, sys, time
+started = time.perf_counter()
+from app.main import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+assert app.test_client().get('/').status_code == 200
+served = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_request': served - created,
+    'deferred_loaded': sorted(m for m in %r if m in sys.modules),
+}))
+""" % (DEFERRED,)
+
+
+def package_costs(importtime_log):
+    """
+    Return {top-level package: cumulative import seconds} from -X importtime output.
+
+    Each module is reported once, when first imported, with the cumulative
+    time of everything it pulled in. A package's cost is its root module's
+    cumulative time, i.e. what importing it added at that point.
+    """
+    costs = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        if '.' not in name:
+            costs[name] = int(cumulative) / 1e6
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=1000,
+                        help='Maximum import + create_app + first request time (default 1000 ms)')
+    parser.add_argument('--top', type=int, default=15, help='Packages to list (default 15)')
+    args = parser.parse_args()
+
+    env = dict(os.environ, FORCE_DEFAULT_LOCATION='1', NOTIFICATIONS_ENABLED='0',
+               PYTHONPATH=ROOT)
+    env.pop('PROFILE_TOKEN', None)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        sys.exit(result.returncode)
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    costs = package_costs(result.stderr)
+
+    print(f"{'package':<28} {'import ms':>10}")
+    for name, seconds in sorted(costs.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<28} {seconds * 1000:>10.1f}")
+    print()
+    total = phases['import'] + phases['create_app'] + phases['first_request']
+    for phase in ('import', 'create_app', 'first_request'):
+        print(f"{phase:<28} {phases[phase] * 1000:>10.1f}")
+    print(f"{'total':<28} {total * 1000:>10.1f}  (budget {args.budget_ms:.0f})")
+
+    failed = False
+    if phases['deferred_loaded']:
+        print(f"Deferred packages imported at startup: {', '.join(phases['deferred_loaded'])}")
+        failed = True
+    if total * 1000 > args.budget_ms:
+        print(f"Startup took {total * 1000:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Offline bulk scoring of GPS point files against the nuclear plant registry.
+
+Reads a CSV or NDJSON file of points in fixed-size chunks, scores each chunk
+on a process pool and appends the results to the output file as chunks
+finish, so memory stays constant however large the input is. Workers
+memory-map the processed plant table from the on-disk columnar cache
+instead of receiving a pickled DataFrame per task.
+
+With ``--raster`` points are classified through the precomputed risk
+raster (a cell lookup plus an exact check on a few candidates) instead of
+a distance to every plant. Zone columns are identical either way, but
+``nearest_plant``/``nearest_km`` then only consider plants whose zone radius
+reaches the point's cell, and are empty where none does.
+
+Usage:
+    python score_points.py fixes.csv scored.csv
+    python score_points.py fixes.ndjson scored.ndjson --workers 8 --chunk-size 200000
+    python score_points.py fixes.csv scored.csv --raster
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.config import PLANT_DATA_SETTINGS
+from app.utils.plant_store import load_plant_table
+from app.utils.proximity import batch_proximity
+from app.utils.risk_raster import RiskRaster, raster_key
+from app.utils.table_cache import TableCache
+
+# Plant columns (and optionally the raster) each worker maps into memory, set by _init_worker
+_plants = {}
+_raster = None
+
+OUTPUT_ZONES = ('Dangerous', 'Moderate', 'Safe')
+
+# Output values for rows whose coordinates are missing or out of range
+INVALID_ROW = {
+    'dangerous_count': 0,
+    'moderate_count': 0,
+    'safe_count': 0,
+    'zone': 'Invalid',
+    'on_site': False,
+    'nearest_plant': '',
+    'nearest_km': np.nan,
+}
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def prepare_plant_table(data_path):
+    """
+    Make sure the processed plant table is in the columnar cache.
+
+    Returns:
+        str: Directory of ``.npy`` column files workers can memory-map
+    """
+    cache = TableCache()
+    digest = cache.source_digest(data_path)
+    if cache.load(digest) is None:
+        cache.store(digest, load_plant_table(data_path))
+    return cache.entry_path(digest)
+
+
+def prepare_raster(table_dir):
+    """
+    Make sure a risk raster for the cached plant table exists next to it.
+
+    Returns:
+        str: Directory of the saved raster (keyed by the zone radii and cell size)
+    """
+    raster_dir = os.path.join(table_dir, raster_key())
+    if not os.path.isdir(raster_dir):
+        safety = np.load(os.path.join(table_dir, 'Safety.npy'))
+        RiskRaster.build(
+            np.load(os.path.join(table_dir, 'Latitude.npy')),
+            np.load(os.path.join(table_dir, 'Longitude.npy')),
+            safety,
+        ).save(raster_dir)
+    return raster_dir
+
+
+def _init_worker(table_dir, raster_dir=None):
+    global _raster
+    for column in ('Name', 'Latitude', 'Longitude', 'Safety'):
+        _plants[column] = np.load(os.path.join(table_dir, f'{column}.npy'), mmap_mode='r')
+    if raster_dir:
+        _raster = RiskRaster.load(raster_dir)
+
+
+def score_chunk(latitudes, longitudes):
+    """
+    Score one chunk of points against the memory-mapped plant table.
+
+    Points with a missing, non-finite or out-of-range coordinate are not
+    scored; their rows get the INVALID_ROW values (zone 'Invalid').
+
+    Returns:
+        dict: Output columns (arrays aligned with the input points)
+    """
+    n = len(latitudes)
+    valid = (np.isfinite(latitudes) & np.isfinite(longitudes)
+             & (np.abs(latitudes) <= 90) & (np.abs(longitudes) <= 180))
+    if not valid.all():
+        scored = score_chunk(latitudes[valid], longitudes[valid])
+        columns = {}
+        for column, values in scored.items():
+            full = np.full(n, INVALID_ROW[column], dtype=values.dtype)
+            full[valid] = values
+            columns[column] = full
+        return columns
+
+    names = np.asarray(_plants['Name'])
+    if _raster is not None:
+        result = _raster.classify(latitudes, longitudes)
+        zone_hits, on_site_hits = result['zone_hits'], result['on_site_hits']
+        points, plants, distances = result['pairs']
+        nearest_km = np.full(n, np.inf)
+        np.minimum.at(nearest_km, points, distances)
+        is_nearest = distances == nearest_km[points]
+        nearest_plant = np.full(n, '', dtype=object)
+        nearest_plant[points[is_nearest]] = names[plants[is_nearest]]
+        nearest_km[np.isinf(nearest_km)] = np.nan
+    else:
+        batch = batch_proximity(
+            latitudes, longitudes,
+            _plants['Latitude'], _plants['Longitude'], _plants['Safety'],
+            nearest=1
+        )
+        zone_hits, on_site_hits = batch.zone_hits, batch.on_site_hits
+        nearest_plant = names[batch.nearest_indices[:, 0]] if len(names) else np.full(n, '')
+        nearest_km = batch.nearest_distances[:, 0] if len(names) else np.full(n, np.nan)
+
+    columns = {}
+    zone = np.full(n, 'None', dtype=object)
+    # Least severe first so the most severe zone wins
+    for level in reversed(OUTPUT_ZONES):
+        counts = np.bincount(zone_hits[level][0], minlength=n)
+        columns[f'{level.lower()}_count'] = counts
+        zone[counts > 0] = level
+    columns['zone'] = zone
+    columns['on_site'] = np.bincount(on_site_hits[0], minlength=n) > 0
+    columns['nearest_plant'] = nearest_plant
+    columns['nearest_km'] = np.round(nearest_km, 3)
+    return columns
+
+
+def read_chunks(path, fmt, chunk_size):
+    """Yield DataFrame chunks of the input file."""
+    if fmt == 'ndjson':
+        return pd.read_json(path, lines=True, chunksize=chunk_size)
+    return pd.read_csv(path, chunksize=chunk_size)
+
+
+def write_chunk(out, df, fmt, first):
+    """Append one scored chunk to the output stream."""
+    if fmt == 'ndjson':
+        df.to_json(out, orient='records', lines=True)
+    else:
+        df.to_csv(out, index=False, header=first)
+
+
+def detect_format(path, explicit):
+    if explicit:
+        return explicit
+    return 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help='CSV or NDJSON file of points')
+    parser.add_argument('output', help='CSV or NDJSON file to write')
+    parser.add_argument('--input-format', choices=('csv', 'ndjson'))
+    parser.add_argument('--output-format', choices=('csv', 'ndjson'))
+    parser.add_argument('--lat-col', default='latitude')
+    parser.add_argument('--lon-col', default='longitude')
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--data', default=os.path.join(ROOT, PLANT_DATA_SETTINGS["path"]),
+                        help='Plant CSV file')
+    parser.add_argument('--raster', action='store_true',
+                        help='Classify through the precomputed risk raster')
+    args = parser.parse_args(argv)
+
+    in_fmt = detect_format(args.input, args.input_format)
+    out_fmt = detect_format(args.output, args.output_format)
+    table_dir = prepare_plant_table(args.data)
+    raster_dir = prepare_raster(table_dir) if args.raster else None
+
+    pool = None
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                                   initargs=(table_dir, raster_dir))
+    else:
+        _init_worker(table_dir, raster_dir)
+
+    # Bounded number of chunks in flight keeps memory constant
+    max_in_flight = max(2, args.workers * 2)
+    in_flight = deque()
+    points = 0
+    started = time.perf_counter()
+
+    with open(args.output, 'w', newline='') as out:
+        def drain(limit):
+            nonlocal points
+            while len(in_flight) > limit:
+                chunk, pending = in_flight.popleft()
+                columns = pending.result() if pool else pending
+                write_chunk(out, chunk.assign(**columns), out_fmt, first=points == 0)
+                points += len(chunk)
+                elapsed = time.perf_counter() - started
+                print(f"\r{points:,} points  {points / elapsed:,.0f} points/s",
+                      end='', file=sys.stderr, flush=True)
+
+        try:
+            for chunk in read_chunks(args.input, in_fmt, args.chunk_size):
+                # Unparseable coordinates become NaN and are reported as invalid rows
+                latitudes = pd.to_numeric(chunk[args.lat_col], errors='coerce').to_numpy(
+                    dtype=np.float64)
+                longitudes = pd.to_numeric(chunk[args.lon_col], errors='coerce').to_numpy(
+                    dtype=np.float64)
+                if pool:
+                    in_flight.append((chunk, pool.submit(score_chunk, latitudes, longitudes)))
+                else:
+                    in_flight.append((chunk, score_chunk(latitudes, longitudes)))
+                drain(max_in_flight)
+            drain(0)
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"\nScored {points:,} points in {elapsed:.2f}s "
+          f"({points / elapsed if elapsed else 0:,.0f} points/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
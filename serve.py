@@ -0,0 +1,103 @@
+"""Production server for the Nuclear Radiation Monitoring System.
+
+Runs the app under gunicorn with several worker processes, each serving
+requests on a thread pool. The app (and with it the processed plant
+snapshot and spatial index) is built once in the master process before
+the workers are forked, so workers share those pages copy-on-write
+instead of each loading the dataset. Map layers are rendered lazily by
+the first worker that needs them and shared through the map directory.
+
+Each worker holds its own copy of the plant store, so an in-memory plant
+edit would only reach the worker that served it. The edit endpoints are
+therefore disabled when running more than one worker; edit the source
+CSV instead, which every worker reloads. Geofence state is per worker as
+well: every worker would see a returning user "enter" the same zone and
+notify again, so geofence notifications are also off with several workers.
+
+SIGTERM or SIGINT stops accepting connections, lets in-flight requests
+finish for up to ``graceful_timeout`` seconds and drains each worker's
+notification queue before it exits.
+
+Usage:
+    python serve.py
+    python serve.py --bind 0.0.0.0:8000 --workers 4 --threads 8
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from app.config import SERVER_SETTINGS
+from app.main import create_app
+from app.utils.notifications import dispatcher
+
+
+def server_options(args):
+    """Merge config defaults, environment variables and CLI flags into gunicorn settings."""
+    workers = (args.workers or os.environ.get('WEB_CONCURRENCY')
+               or SERVER_SETTINGS["workers"] or multiprocessing.cpu_count() * 2 + 1)
+    threads = args.threads or os.environ.get('SERVER_THREADS') or SERVER_SETTINGS["threads"]
+    return {
+        'bind': args.bind or os.environ.get('SERVER_BIND') or SERVER_SETTINGS["bind"],
+        'workers': int(workers),
+        'threads': int(threads),
+        'worker_class': 'gthread',
+        'timeout': SERVER_SETTINGS["timeout"],
+        'graceful_timeout': SERVER_SETTINGS["graceful_timeout"],
+        'keepalive': SERVER_SETTINGS["keepalive"],
+        'max_requests': SERVER_SETTINGS["max_requests"],
+        'preload_app': True,
+        'pre_fork': pre_fork,
+        'worker_exit': worker_exit,
+    }
+
+
+def pre_fork(server, worker):
+    # Move everything the master built out of the collector's reach, so GC
+    # passes in the workers don't write to (and un-share) those pages
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    if not dispatcher.flush(timeout=SERVER_SETTINGS["graceful_timeout"]):
+        server.log.warning("Worker %s exited with notifications still pending", worker.pid)
+
+
+class PreloadedApplication(BaseApplication):
+    """A gunicorn application serving an app object built in the master process."""
+
+    def __init__(self, application, options):
+        self.application = application
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bind', help=f"Address to listen on (default {SERVER_SETTINGS['bind']})")
+    parser.add_argument('--workers', type=int, help='Worker processes (default 2 x CPUs + 1)')
+    parser.add_argument('--threads', type=int, help='Request threads per worker')
+    args = parser.parse_args(argv)
+
+    options = server_options(args)
+    app = create_app()
+    if options['workers'] > 1:
+        # Edits would only reach one worker's plant store, and each worker's
+        # geofence state would notify about the same zone entry again
+        app.config['PLANT_UPDATES_ENABLED'] = False
+        app.config['GEOFENCE_NOTIFICATIONS_ENABLED'] = False
+    PreloadedApplication(app, options).run()
+
+
+if __name__ == '__main__':
+    main()
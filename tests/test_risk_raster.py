@@ -0,0 +1,91 @@
+"""An incrementally updated RiskRaster must equal a full rebuild."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.data_processor import classify_safety
+from app.utils.plant_store import PlantSnapshot
+from app.utils.risk_raster import ARRAYS, GLOBAL_BBOX, RiskRaster
+
+
+def assert_same_raster(updated, rebuilt):
+    assert updated.bbox == rebuilt.bbox
+    for name in ARRAYS:
+        np.testing.assert_array_equal(getattr(updated, name), getattr(rebuilt, name), err_msg=name)
+
+
+def random_plants(rng, n):
+    latitudes = rng.uniform(-70, 70, n)
+    longitudes = rng.uniform(-180, 180, n)
+    safety = rng.choice(['Safe', 'Moderate', 'Dangerous', 'Unknown'], n)
+    return latitudes, longitudes, safety
+
+
+@pytest.mark.parametrize('bbox', [GLOBAL_BBOX, None])
+def test_update_plant_matches_rebuild(bbox):
+    rng = np.random.default_rng(7)
+    latitudes, longitudes, safety = random_plants(rng, 60)
+    raster = RiskRaster.build(latitudes, longitudes, safety, resolution_deg=0.5, bbox=bbox)
+
+    # Move and reclassify some plants, append one, remove the last two
+    latitudes, longitudes, safety = latitudes.copy(), longitudes.copy(), safety.copy()
+    for plant_id in (0, 17, 42):
+        latitudes[plant_id] += rng.uniform(-2, 2)
+        longitudes[plant_id] += rng.uniform(-2, 2)
+        safety[plant_id] = 'Dangerous'
+        raster.update_plant(plant_id, latitudes[plant_id], longitudes[plant_id], safety[plant_id])
+    latitudes = np.append(latitudes, latitudes[5] + 0.1)
+    longitudes = np.append(longitudes, longitudes[5])
+    safety = np.append(safety, 'Moderate')
+    raster.update_plant(60, latitudes[60], longitudes[60], safety[60])
+
+    rebuilt = RiskRaster.build(latitudes, longitudes, safety, resolution_deg=0.5,
+                               bbox=raster.bbox)
+    assert_same_raster(raster, rebuilt)
+
+
+def test_updated_copy_matches_rebuild_and_leaves_original():
+    rng = np.random.default_rng(11)
+    latitudes, longitudes, safety = random_plants(rng, 40)
+    raster = RiskRaster.build(latitudes, longitudes, safety, resolution_deg=0.5, bbox=GLOBAL_BBOX)
+    original = {name: np.array(getattr(raster, name)) for name in ARRAYS}
+
+    # Row 3 takes the last plant (a delete), row 8 moves, one plant is appended
+    new_latitudes = np.append(latitudes[:-1], 12.5)
+    new_longitudes = np.append(longitudes[:-1], -30.0)
+    new_safety = np.append(safety[:-1], 'Dangerous')
+    new_latitudes[3], new_longitudes[3], new_safety[3] = latitudes[-1], longitudes[-1], safety[-1]
+    new_latitudes[8] += 1.0
+    updated = raster.updated(new_latitudes, new_longitudes, new_safety, [3, 8, 39], 'v2')
+
+    rebuilt = RiskRaster.build(new_latitudes, new_longitudes, new_safety, resolution_deg=0.5,
+                               bbox=GLOBAL_BBOX)
+    assert_same_raster(updated, rebuilt)
+    assert updated.version == 'v2'
+    for name in ARRAYS:
+        np.testing.assert_array_equal(getattr(raster, name), original[name], err_msg=name)
+
+
+def test_snapshot_changes_update_built_raster():
+    df = pd.DataFrame({
+        'PlantId': ['A', 'B', 'C', 'D'],
+        'Name': ['A', 'B', 'C', 'D'],
+        'Latitude': [25.4, 48.5, 35.0, -33.9],
+        'Longitude': [81.8, 2.3, 139.0, 18.4],
+        'Age': [5, 25, 45, 12],
+        'Country': ['', '', '', ''],
+        'Status': ['', '', '', ''],
+    })
+    df['Safety'] = classify_safety(df['Age'])
+    snapshot = PlantSnapshot.from_dataframe(df, 'v1')
+    snapshot.raster  # built before the change, so it is carried over incrementally
+
+    changed, _ = snapshot.with_changes(
+        {'B': {'Latitude': 49.0, 'Age': 50}, 'E': {'Latitude': 10.0, 'Longitude': 10.0}},
+        deletes=['A'], version='v2'
+    )
+    assert 'raster' in changed.__dict__
+    rebuilt = RiskRaster.build(changed.latitudes, changed.longitudes, changed.safety,
+                               resolution_deg=changed.raster.resolution, bbox=GLOBAL_BBOX)
+    assert_same_raster(changed.raster, rebuilt)